@@ -0,0 +1,175 @@
+import re
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+import translate_subtitles
+from translate_subtitles import (iter_srt, iter_batches, create_batches, parse_batch_response,
+                                 translate_srt_multi, MockBackend, format_timestamp)
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# The whole-file regex parser that iter_srt replaced, kept for comparison
+LEGACY_PATTERN = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?=\n\n\d+\n|$)'
+
+def legacy_parse_srt(srt_content):
+    return [(m[0], m[1], m[2], m[3].strip()) for m in re.findall(LEGACY_PATTERN, srt_content)]
+
+# Function to write a synthetic SRT file with the given number of cues
+def write_synthetic_srt(path, cues, newline='\n'):
+    with open(path, 'w', encoding='utf-8', newline=newline) as f:
+        for i in range(cues):
+            start = i * 2500
+            lines = f"Synthetic subtitle number {i+1}" if i % 3 else f"Line {i+1}, first part\nand a second line"
+            f.write(f"{i+1}\n{format_timestamp(start)} --> {format_timestamp(start + 2000)}\n{lines}\n\n")
+
+# Function to time a callable, returning (seconds, peak traced memory in bytes, result)
+# Memory is traced in a second run so tracemalloc overhead does not skew the timing
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def bench_parsers(path):
+    def legacy():
+        with open(path, 'r', encoding='utf-8') as f:
+            return len(legacy_parse_srt(f.read()))
+
+    def streaming():
+        # Consume the generator batch by batch, as the translation pipeline does
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            return sum(len(batch) for batch in iter_batches(iter_srt(f), 15))
+
+    for name, func in (('legacy regex', legacy), ('streaming', streaming)):
+        elapsed, peak, cues = measure(func)
+        print(f"{name:>14}: {cues} cues in {elapsed:.3f}s ({cues / elapsed:,.0f} cues/s), peak memory {peak / 1e6:.2f} MB")
+
+# Function to run every pipeline stage on one synthetic file, returning times in seconds per stage
+def bench_pipeline(path, cues, args):
+    result = {'cues': cues}
+    
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        parsed = list(iter_srt(f))
+    result['parse_seconds'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batches = create_batches(parsed, args.batch_size)
+    result['batch_seconds'] = time.perf_counter() - start
+    
+    # Responses are generated up front so only the parsing is timed
+    backend = MockBackend(seed=args.seed)
+    responses = [backend.translate(batch, 'it') for batch in batches]
+    start = time.perf_counter()
+    for response, batch in zip(responses, batches):
+        parse_batch_response(response, batch, [])
+    result['response_parse_seconds'] = time.perf_counter() - start
+    del parsed, batches, responses
+    
+    def end_to_end():
+        backend = MockBackend(latency=args.latency, error_rate=args.error_rate, drop_rate=args.drop_rate, seed=args.seed)
+        translate_srt_multi(path, ['it'], batch_size=args.batch_size, concurrency=args.concurrency, requests_per_second=0,
+                            retry_delay=0, backend=backend, journal=False, output_files={'it': path + '.out'})
+    
+    elapsed, peak, _ = measure(end_to_end) if args.memory else (None, None, None)
+    if elapsed is None:
+        start = time.perf_counter()
+        end_to_end()
+        elapsed = time.perf_counter() - start
+    result['end_to_end_seconds'] = elapsed
+    result['cues_per_second'] = cues / elapsed
+    result['peak_memory_mb'] = peak / 1e6 if peak is not None else None
+    return result
+
+# Function to describe the code being measured, so results from different commits can be told apart
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {'commit': commit or None, 'python': platform.python_version(), 'platform': platform.platform()}
+
+def run_suite(args):
+    # Per-batch log lines (and the mock's simulated failures) would dominate the timing of large files
+    translate_subtitles.logger.setLevel(logging.CRITICAL)
+    results = []
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for cues in args.sizes:
+            path = os.path.join(tmp, f'synthetic_{cues}.srt')
+            write_synthetic_srt(path, cues)
+            result = bench_pipeline(path, cues, args)
+            results.append(result)
+            memory = f", peak {result['peak_memory_mb']:.1f} MB" if result['peak_memory_mb'] is not None else ""
+            print(f"{cues:>8} cues: parse {result['parse_seconds']:.3f}s, batch {result['batch_seconds']:.3f}s, "
+                  f"response parse {result['response_parse_seconds']:.3f}s, end to end {result['end_to_end_seconds']:.3f}s "
+                  f"({result['cues_per_second']:,.0f} cues/s){memory}")
+            os.remove(path)
+    
+    report = {'environment': environment(), 'settings': {key: value for key, value in vars(args).items()
+                                                          if key not in ('output', 'compare')}, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+    
+    if args.compare:
+        compare(report, args.compare)
+
+# Function to print how each measurement changed relative to an earlier results file
+def compare(report, baseline_file):
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    
+    print(f"Compared with {baseline['environment'].get('commit')} (ratio new/old, lower is better except cues/s):")
+    old_results = {result['cues']: result for result in baseline['results']}
+    for result in report['results']:
+        old = old_results.get(result['cues'])
+        if old is None:
+            continue
+        ratios = []
+        for key in ('parse_seconds', 'batch_seconds', 'response_parse_seconds', 'end_to_end_seconds', 'cues_per_second', 'peak_memory_mb'):
+            if result.get(key) and old.get(key):
+                ratios.append(f"{key} x{result[key] / old[key]:.2f}")
+        print(f"{result['cues']:>8} cues: {', '.join(ratios)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the subtitle pipeline on synthetic SRT files')
+    parser.add_argument('--cues', type=int, default=100000, help='Number of cues in the synthetic file (default: 100000)')
+    parser.add_argument('--crlf', action='store_true', help='Write the synthetic file with CRLF line endings')
+    parser.add_argument('--suite', action='store_true', help='Run the whole pipeline against the mock backend instead of comparing parsers')
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')], default=list(DEFAULT_SIZES),
+                        help='Comma separated file sizes in cues for --suite (default: 1000,10000,100000; try up to 500000)')
+    parser.add_argument('--batch_size', type=int, default=15, help='Subtitles per batch (default: 15)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Batches in flight (default: 4)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mock backend latency per request in seconds (default: 0)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Fraction of mock requests that fail (default: 0)')
+    parser.add_argument('--drop_rate', type=float, default=0.0, help='Fraction of subtitles the mock leaves out of its responses (default: 0)')
+    parser.add_argument('--seed', type=int, default=0, help='Mock backend seed (default: 0)')
+    parser.add_argument('--memory', action='store_true', help='Also measure peak memory (runs the end-to-end stage twice)')
+    parser.add_argument('--output', help='Save the --suite results as JSON')
+    parser.add_argument('--compare', help='Compare the --suite results with an earlier JSON results file')
+    args = parser.parse_args()
+
+    if args.suite:
+        run_suite(args)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.srt')
+        write_synthetic_srt(path, args.cues, '\r\n' if args.crlf else '\n')
+        print(f"Synthetic file: {args.cues} cues, {os.path.getsize(path) / 1e6:.1f} MB")
+        bench_parsers(path)
@@ -1,35 +1,839 @@
 import re
+import io
 import requests
 import json
 import time
+import random
 import argparse
 import os
 import pathlib
+import itertools
 import logging
+import threading
+import collections
+from array import array
+import sqlite3
+import hashlib
+import unicodedata
+import gzip
+import html
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Configure logging
 logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODEL = "anthropic/claude-3-7-sonnet"
+
+# USD per million (prompt, completion) tokens, used for the cost estimate in the run report
+MODEL_PRICES = {
+    "anthropic/claude-3-7-sonnet": (3.0, 15.0),
+}
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+# Rough characters-per-token ratio used to estimate request size for the token budget
+CHARS_PER_TOKEN = 4
+
+# Shared by every request whatever the language, batch or glossary, so it is always a cacheable prompt prefix
+SYSTEM_PROMPT = ("You are a professional subtitle translator. Maintain the meaning and tone of the original text. Do not add or remove content. "
+                 "Keep placeholders such as {1} where they belong in the translated sentence. "
+                 "Return ONLY the translated text for each subtitle, keeping the 'SUBTITLE X:' format intact.")
+
+# Raised when a translation request fails; retry_after carries the server's Retry-After hint in seconds
+class TranslationError(Exception):
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+# Function to compute an exponential backoff delay with full jitter, deferring to the server's hint if any
+def backoff_delay(attempt, base_delay=2, max_delay=60, retry_after=None):
+    if retry_after is not None:
+        return min(retry_after, max_delay * 5)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+# Function to read the Retry-After header (seconds or HTTP date) of a response
+def parse_retry_after(response):
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            from email.utils import parsedate_to_datetime
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+# Token-bucket style limiter shared by all worker threads
+class RateLimiter:
+    def __init__(self, requests_per_second=None, tokens_per_minute=None):
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._next_request = time.monotonic()
+        self._tokens = float(tokens_per_minute or 0)
+        self._tokens_updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def pause(self, seconds):
+        """Hold back every worker, e.g. after the server answered 429 Too Many Requests"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens=0):
+        """Block until a request of the given estimated token size may be sent"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            
+            if self.requests_per_second:
+                wait = max(wait, self._next_request - now)
+                self._next_request = max(self._next_request, now) + 1.0 / self.requests_per_second
+            
+            if self.tokens_per_minute:
+                # Refill the bucket, then borrow against the future if it runs dry
+                refill = (now - self._tokens_updated) * self.tokens_per_minute / 60.0
+                self._tokens = min(float(self.tokens_per_minute), self._tokens + refill)
+                self._tokens_updated = now
+                tokens = min(tokens, self.tokens_per_minute)
+                self._tokens -= tokens
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens * 60.0 / self.tokens_per_minute)
+        
+        if wait > 0:
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Rate limiter waiting {wait:.2f}s")
+            time.sleep(wait)
+
+# Connection setup time of the current thread's request; stays 0 when a pooled connection is reused
+_connect_timing = threading.local()
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _connect_timing.seconds = time.perf_counter() - started
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _connect_timing.seconds = time.perf_counter() - started
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+# Keep-alive HTTP client shared by all batches and files, recording connect/TTFB/total time per request
+class TranslationClient:
+    def __init__(self, pool_size=10, compress=False, timeout=300):
+        self.compress = compress
+        self.timeout = timeout
+        self.timings = []
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post_json(self, url, headers, payload):
+        """POST a JSON payload and return the response; timing is appended to self.timings"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = dict(headers, **{"Content-Type": "application/json"})
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        
+        _connect_timing.seconds = 0.0
+        started = time.perf_counter()
+        # stream=True returns as soon as the headers arrive, so the body read can be timed separately
+        response = self.session.post(url, headers=headers, data=body, stream=True, timeout=self.timeout)
+        ttfb = time.perf_counter() - started
+        response.content
+        timing = {'connect': _connect_timing.seconds, 'ttfb': ttfb, 'total': time.perf_counter() - started}
+        
+        with self._lock:
+            self.timings.append(timing)
+        
+        if logger.level == logging.DEBUG:
+            logger.debug(f"Request timing: connect {timing['connect']*1000:.0f}ms, TTFB {timing['ttfb']*1000:.0f}ms, total {timing['total']*1000:.0f}ms")
+        
+        return response
+
+    def stream_chat(self, url, headers, payload, usage=None):
+        """POST a streaming chat completion and yield the content deltas of its server-sent events"""
+        body = json.dumps(dict(payload, stream=True, stream_options={'include_usage': True}), ensure_ascii=False).encode('utf-8')
+        headers = dict(headers, **{"Content-Type": "application/json", "Accept": "text/event-stream"})
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        
+        _connect_timing.seconds = 0.0
+        started = time.perf_counter()
+        response = self.session.post(url, headers=headers, data=body, stream=True, timeout=self.timeout)
+        ttfb = None
+        try:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                # Blank lines separate events and lines starting with ':' are keep-alive comments
+                if not line or line.startswith(':') or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                event = json.loads(data)
+                if 'error' in event:
+                    raise TranslationError(f"Stream error: {event['error']}")
+                if usage is not None and event.get('usage'):
+                    usage.update(event['usage'])
+                content = (event.get('choices') or [{}])[0].get('delta', {}).get('content')
+                if content:
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - started
+                    yield content
+        finally:
+            response.close()
+            total = time.perf_counter() - started
+            timing = {'connect': _connect_timing.seconds, 'ttfb': total if ttfb is None else ttfb, 'total': total}
+            with self._lock:
+                self.timings.append(timing)
+
+    def timing_summary(self):
+        with self._lock:
+            timings = list(self.timings)
+        if not timings:
+            return None
+        summary = {'requests': len(timings), 'new_connections': sum(1 for t in timings if t['connect'] > 0)}
+        for key in ('connect', 'ttfb', 'total'):
+            summary[f'mean_{key}'] = sum(t[key] for t in timings) / len(timings)
+        return summary
+
+    def close(self):
+        self.session.close()
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+# Function to get the client shared by everything that does not pass its own
+def get_default_client():
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = TranslationClient()
+        return _default_client
+
+# Thread-safe counters and latency histogram for a run, exportable as a JSON report or in Prometheus text format
+class RunMetrics:
+    def __init__(self, model=DEFAULT_MODEL, prices=None):
+        self.model = model
+        self.prices = prices or MODEL_PRICES.get(model)
+        self.started = time.time()
+        self.requests = 0
+        self.failed_requests = 0
+        self.retries = 0
+        self.cues_translated = 0
+        self.cues_requeued = 0
+        self.cues_untranslated = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cues_deduplicated = 0
+        self.tokens_saved_by_dedup = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.languages = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, latency, ok=True, usage=None):
+        with self._lock:
+            self.requests += 1
+            self.failed_requests += not ok
+            self.latency_sum += latency
+            self.latency_buckets[next((n for n, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))] += 1
+            if usage:
+                self.prompt_tokens += usage.get('prompt_tokens') or 0
+                self.cached_prompt_tokens += cached_prompt_tokens(usage)
+                self.completion_tokens += usage.get('completion_tokens') or 0
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_cues(self, language, translated=0, requeued=0, untranslated=0):
+        with self._lock:
+            self.cues_translated += translated
+            self.cues_requeued += requeued
+            self.cues_untranslated += untranslated
+            self.languages[language] = self.languages.get(language, 0) + translated
+
+    def record_dedup(self, cues, tokens):
+        with self._lock:
+            self.cues_deduplicated += cues
+            self.tokens_saved_by_dedup += tokens
+
+    def record_cache(self, hits, misses):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def estimated_cost(self):
+        if not self.prices:
+            return None
+        return (self.prompt_tokens * self.prices[0] + self.completion_tokens * self.prices[1]) / 1e6
+
+    def report(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            buckets = dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'], self.latency_buckets))
+            return {
+                'model': self.model,
+                'elapsed_seconds': elapsed,
+                'requests': self.requests,
+                'failed_requests': self.failed_requests,
+                'retries': self.retries,
+                'cues_translated': self.cues_translated,
+                'cues_requeued': self.cues_requeued,
+                'cues_untranslated': self.cues_untranslated,
+                'cues_per_second': self.cues_translated / elapsed if elapsed else 0.0,
+                'cues_by_language': dict(self.languages),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cues_deduplicated': self.cues_deduplicated,
+                'tokens_saved_by_dedup': self.tokens_saved_by_dedup,
+                'prompt_tokens': self.prompt_tokens,
+                'cached_prompt_tokens': self.cached_prompt_tokens,
+                'prompt_cache_hit_ratio': self.cached_prompt_tokens / self.prompt_tokens if self.prompt_tokens else None,
+                'completion_tokens': self.completion_tokens,
+                'estimated_cost_usd': self.estimated_cost(),
+                'mean_latency_seconds': self.latency_sum / self.requests if self.requests else None,
+                'latency_histogram': buckets,
+            }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def to_prometheus(self, prefix='subtitle_translator'):
+        report = self.report()
+        lines = []
+        
+        def metric(name, kind, value, help_text, labels=''):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"{prefix}_{name}{labels} {value}")
+        
+        metric('requests_total', 'counter', report['requests'], 'Translation requests sent')
+        metric('failed_requests_total', 'counter', report['failed_requests'], 'Translation requests that failed')
+        metric('retries_total', 'counter', report['retries'], 'Batch retries')
+        metric('cues_translated_total', 'counter', report['cues_translated'], 'Subtitles translated by the model')
+        metric('cues_untranslated_total', 'counter', report['cues_untranslated'], 'Subtitles left in the original language')
+        metric('cache_hits_total', 'counter', report['cache_hits'], 'Translation cache hits')
+        metric('cache_misses_total', 'counter', report['cache_misses'], 'Translation cache misses')
+        metric('cues_deduplicated_total', 'counter', report['cues_deduplicated'], 'Repeated subtitles served from another translation')
+        metric('tokens_saved_by_dedup_total', 'counter', report['tokens_saved_by_dedup'], 'Estimated tokens saved by deduplication')
+        metric('prompt_tokens_total', 'counter', report['prompt_tokens'], 'Prompt tokens used')
+        metric('cached_prompt_tokens_total', 'counter', report['cached_prompt_tokens'], 'Prompt tokens served from the provider prompt cache')
+        metric('completion_tokens_total', 'counter', report['completion_tokens'], 'Completion tokens used')
+        metric('cues_per_second', 'gauge', report['cues_per_second'], 'Translated subtitles per second of wall time')
+        if report['estimated_cost_usd'] is not None:
+            metric('estimated_cost_usd', 'gauge', report['estimated_cost_usd'], 'Estimated cost of the run in USD')
+        
+        name = f"{prefix}_request_latency_seconds"
+        lines.append(f"# HELP {name} Translation request latency")
+        lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in report['latency_histogram'].items():
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.latency_sum}")
+        lines.append(f"{name}_count {report['requests']}")
+        return "\n".join(lines) + "\n"
+
+# Function to read how many prompt tokens the provider served from its prompt cache (OpenAI or Anthropic usage format)
+def cached_prompt_tokens(usage):
+    details = usage.get('prompt_tokens_details') or {}
+    return details.get('cached_tokens') or usage.get('cache_read_input_tokens') or 0
+
+# On-disk translation memory keyed by (source text, language, model), with LRU eviction
+class TranslationCache:
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+        
+        if logger.level == logging.DEBUG:
+            logger.debug(f"Opened translation cache {path} with {len(self)} entries")
+
+    @staticmethod
+    def make_key(text, language, model):
+        # 'it' and 'Italian' share the same entries
+        return hashlib.sha1(f"{model}\0{get_language_name(language).lower()}\0{text}".encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get(self, text, language, model):
+        key = self.make_key(text, language, model)
+        with self._lock:
+            row = self._conn.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put_many(self, items, language, model):
+        """Store (source text, translation) pairs, then evict the least recently used entries"""
+        now = time.time()
+        rows = [(self.make_key(text, language, model), translation, now) for text, translation in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)", rows)
+            excess = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used LIMIT ?)", (excess,))
+                if logger.level == logging.DEBUG:
+                    logger.debug(f"Evicted {excess} entries from translation cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+# Append-only journal of completed batches, so an interrupted translation can resume where it stopped
+class TranslationJournal:
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.completed = {}
+        self._lock = threading.Lock()
+        
+        if os.path.exists(path):
+            self._load()
+        
+        self._file = open(path, 'a', encoding='utf-8')
+        if not self.completed:
+            self._file.truncate(0)
+            self._write({'fingerprint': fingerprint})
+
+    def _load(self):
+        path = self.path
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half written
+                    logger.warning(f"Ignoring truncated line {line_number+1} in journal {path}")
+                    continue
+                if line_number == 0 and record.get('fingerprint') != self.fingerprint:
+                    logger.warning(f"Journal {path} belongs to a different input or model, starting over")
+                    return
+                for position, text in record.get('batch', []):
+                    self.completed[position] = text
+        
+        if self.completed:
+            logger.info(f"Resuming from journal {path}: {len(self.completed)} subtitles already translated")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def append(self, items):
+        """Record (cue position, translated text) pairs of a finished batch"""
+        with self._lock:
+            self._write({'batch': [[position, text] for position, text in items]})
+
+    def close(self):
+        """Close the journal but keep it, so a later run can resume from it"""
+        with self._lock:
+            self._file.close()
+
+    def remove(self):
+        with self._lock:
+            self._file.close()
+            os.remove(self.path)
+
+# Function to fingerprint an input file together with the settings that affect its translation
+def file_fingerprint(input_file, language, model):
+    digest = hashlib.sha1()
+    with open(input_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}:{get_language_name(language).lower()}:{model}"
+
+# Function to estimate the number of tokens a batch will use (prompt plus completion)
+def estimate_batch_tokens(batch):
+    chars = sum(len(text) + 16 for _, _, _, text in batch)
+    return 2 * chars // CHARS_PER_TOKEN
+
+SRT_TIMING = re.compile(r'^\s*(\d{1,2}:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d{1,2}:\d{2}:\d{2}[,.]\d{3})')
+
+# Generator that parses SRT cues line by line from a file object, in constant memory
+def iter_srt(lines):
+    cue = None      # [index, start, end, text lines] of the cue being read
+    held = []       # blank and number lines that may start the next cue or belong to the text
+    last_index = 0
+    skipped = 0
+    
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    
+    for line_number, line in enumerate(itertools.chain((first.lstrip('\ufeff'),), lines)):
+        line = line.rstrip('\r\n')
+        stripped = line.strip()
+        
+        timing = SRT_TIMING.match(line) if '-->' in line else None
+        if timing:
+            # A timing line always opens a new cue; the number just above it is its index
+            index = held.pop().strip() if held and held[-1].strip().isdigit() else None
+            
+            if cue is not None:
+                cue[3].extend(held)
+                yield (cue[0], cue[1], cue[2], "\n".join(cue[3]).strip())
+            
+            if index is None:
+                # Malformed cue without a number: keep the numbering going
+                index = str(last_index + 1)
+                if logger.level == logging.DEBUG:
+                    logger.debug(f"Cue at line {line_number+1} has no index, numbering it {index}")
+            
+            last_index = int(index)
+            cue = [index, timing.group(1).replace('.', ','), timing.group(2).replace('.', ','), []]
+            held = []
+        elif not stripped or stripped.isdigit():
+            if cue is not None or stripped:
+                held.append(line)
+        elif cue is not None:
+            # Blank lines inside a cue are kept as part of its text
+            cue[3].extend(held)
+            cue[3].append(line)
+            held = []
+        else:
+            skipped += 1
+            held = []
+    
+    if cue is not None:
+        # No timing line follows, so number lines right below the text are the end of it;
+        # after a blank line a number can only be the start of a cue cut off with the file
+        blank = next((n for n, line in enumerate(held) if not line.strip()), len(held))
+        cue[3].extend(held[:blank])
+        yield (cue[0], cue[1], cue[2], "\n".join(cue[3]).strip())
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed lines outside of any subtitle cue")
+
 # Function to parse SRT
 def parse_srt(srt_content):
     if logger.level == logging.DEBUG:
         logger.debug(f"Parsing SRT file with length: {len(srt_content)} characters")
     
-    pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?=\n\n\d+\n|$)'
-    matches = re.findall(pattern, srt_content)
+    entries = list(iter_srt(io.StringIO(srt_content)))
     
     if logger.level == logging.DEBUG:
-        logger.debug(f"Found {len(matches)} subtitle entries")
+        logger.debug(f"Found {len(entries)} subtitle entries")
     
-    return [(m[0], m[1], m[2], m[3].strip()) for m in matches]
+    return entries
+
+# Function to convert a timestamp such as 00:01:02,345 (SRT), 01:02.345 (WebVTT) or 0:01:02.34 (ASS) to milliseconds
+def parse_timestamp(timestamp):
+    if len(timestamp) == 12:
+        # Fast path for the canonical HH:MM:SS,mmm form
+        return int(timestamp[0:2]) * 3600000 + int(timestamp[3:5]) * 60000 + int(timestamp[6:8]) * 1000 + int(timestamp[9:12])
+    *hours, minutes, rest = timestamp.strip().split(':')
+    seconds, _, fraction = rest.replace(',', '.').partition('.')
+    return ((int(hours[0]) if hours else 0) * 60 + int(minutes)) * 60000 + int(seconds) * 1000 + int(fraction.ljust(3, '0')[:3])
+
+# Function to format milliseconds as an SRT timestamp
+def format_timestamp(ms):
+    return '%02d:%02d:%02d,%03d' % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+# Compact cue storage: numbers and millisecond timestamps in typed arrays, texts in one list.
+# Cues are addressed by position and only turned into (index, start, end, text) tuples when a batch needs them;
+# whatever a subtitle format needs to write a cue back (styling tags, cue settings) is kept in extras, by position
+class CueStore:
+    __slots__ = ('indices', 'starts', 'ends', 'texts', 'extras')
+
+    def __init__(self, cues=()):
+        self.indices = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.texts = []
+        self.extras = {}
+        self.extend(cues)
+
+    def extend(self, cues):
+        for index, start_time, end_time, text in cues:
+            self.indices.append(int(index))
+            self.starts.append(parse_timestamp(start_time))
+            self.ends.append(parse_timestamp(end_time))
+            self.texts.append(text)
+
+    def append(self, index, start, end, text, extra=None):
+        """Add one cue with millisecond timestamps"""
+        if extra is not None:
+            self.extras[len(self.texts)] = extra
+        self.indices.append(index)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def index(self, position):
+        return str(self.indices[position])
+
+    def __getitem__(self, position):
+        return (str(self.indices[position]), format_timestamp(self.starts[position]),
+                format_timestamp(self.ends[position]), self.texts[position])
+
+    def __iter__(self):
+        return self.cues(range(len(self)))
+
+    def cues(self, positions):
+        for position in positions:
+            yield self[position]
+
+# Styling and positioning tags: <i>, <font ...> and {\an8} in SRT, <i>, <c.yellow> and <v Name> in WebVTT, {\...} override blocks in ASS
+SRT_TAGS = re.compile(r'<[^>\n]*>|\{\\[^}\n]*\}')
+VTT_TAGS = re.compile(r'<[^>\n]*>')
+ASS_TAGS = re.compile(r'\{[^}\n]*\}')
+PLACEHOLDER = re.compile(r'\{(\d+)\}')
+
+# Function to take the tags out of a cue before it goes to the model; tags around the whole text are set aside,
+# tags inside it become numbered placeholders such as {1}. Returns the plain text and what restore_markup needs, or None
+def split_markup(text, pattern):
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return text, None
+    
+    first, start = 0, 0
+    while first < len(matches) and matches[first].start() == start:
+        start = matches[first].end()
+        first += 1
+    last, end = len(matches), len(text)
+    while last > first and matches[last - 1].end() == end:
+        end = matches[last - 1].start()
+        last -= 1
+    
+    parts = []
+    position = start
+    for number, match in enumerate(matches[first:last], 1):
+        parts.append(f"{text[position:match.start()]}{{{number}}}")
+        position = match.end()
+    parts.append(text[position:end])
+    inline = tuple(match.group() for match in matches[first:last])
+    return "".join(parts), (text[:start], inline, text[end:])
+
+# Function to put the tags taken out by split_markup back into a (translated) text
+def restore_markup(text, markup):
+    if markup is None:
+        return text
+    prefix, inline, suffix = markup
+    if inline:
+        used = set()
+        
+        def put_back(match):
+            number = int(match.group(1))
+            if 0 < number <= len(inline) and number not in used:
+                used.add(number)
+                return inline[number - 1]
+            return ""
+        
+        text = PLACEHOLDER.sub(put_back, text)
+        # Tags the model dropped go at the end, so anything they open is still closed
+        text += "".join(tag for number, tag in enumerate(inline, 1) if number not in used)
+    return f"{prefix}{text}{suffix}"
+
+# Subtitle formats: read() parses a file object into a CueStore, keeping the file's header and footer,
+# and format_cue() writes one cue back with its translated text, timing, settings and tags
+class SrtFormat:
+    name = 'SRT'
+
+    def __init__(self):
+        self.header = ""
+        self.footer = ""
+
+    def read(self, lines):
+        cues = CueStore()
+        for index, start_time, end_time, text in iter_srt(lines):
+            if '<' in text or '{' in text:
+                text, markup = split_markup(text, SRT_TAGS)
+            else:
+                markup = None
+            cues.append(int(index), parse_timestamp(start_time), parse_timestamp(end_time), text, markup)
+        return cues
+
+    def format_cue(self, cues, position, text):
+        return (f"{cues.indices[position]}\n{format_timestamp(cues.starts[position])} --> {format_timestamp(cues.ends[position])}\n"
+                f"{restore_markup(text, cues.extras.get(position))}\n\n")
+
+VTT_TIMING = re.compile(r'^\s*((?:\d+:)?\d{2}:\d{2}[.,]\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}[.,]\d{3})(.*)$')
+
+# WebVTT: cue identifiers and settings (position, line, align...) are kept per cue; the WEBVTT header and
+# STYLE, REGION and NOTE blocks are written back where they were. Cues are numbered in file order for the model
+class VttFormat:
+    name = 'WebVTT'
+
+    def __init__(self):
+        self.header = "WEBVTT\n\n"
+        self.footer = ""
+
+    def read(self, lines):
+        cues = CueStore()
+        blocks = []
+        block = []
+        for line in itertools.chain(lines, [""]):
+            line = line.rstrip('\r\n')
+            if line.strip():
+                block.append(line)
+                continue
+            if not block:
+                continue
+            
+            timing = None
+            for offset, candidate in enumerate(block[:2]):
+                timing = VTT_TIMING.match(candidate) if '-->' in candidate else None
+                if timing:
+                    break
+            if timing is None:
+                blocks.append("\n".join(block))
+            else:
+                identifier = block[0] if offset else ""
+                text, markup = split_markup("\n".join(block[offset + 1:]), VTT_TAGS)
+                if '&' in text:
+                    text = html.unescape(text)
+                if not len(cues):
+                    self.header = "".join(f"{other}\n\n" for other in blocks)
+                    blocks = []
+                before = "".join(f"{other}\n\n" for other in blocks)
+                blocks = []
+                extra = (before, identifier, timing.group(3), markup) if before or identifier or timing.group(3) or markup else None
+                cues.append(len(cues) + 1, parse_timestamp(timing.group(1)), parse_timestamp(timing.group(2)), text, extra)
+            block = []
+        
+        if not len(cues):
+            self.header = ""
+        self.footer = "\n\n".join(blocks) + "\n" if blocks else ""
+        return cues
+
+    def format_cue(self, cues, position, text):
+        before, identifier, settings, markup = cues.extras.get(position) or ("", "", "", None)
+        text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        if identifier:
+            before = f"{before}{identifier}\n"
+        return (f"{before}{format_vtt_timestamp(cues.starts[position])} --> {format_vtt_timestamp(cues.ends[position])}{settings}\n"
+                f"{restore_markup(text, markup)}\n\n")
+
+# ASS/SSA: everything up to the first Dialogue line ([Script Info], styles, the [Events] Format line) is the header;
+# every Dialogue keeps its other fields (layer, style, margins, effect) and its override tags, and Comment lines stay in place
+class AssFormat:
+    name = 'ASS'
+
+    def __init__(self):
+        self.header = ""
+        self.footer = ""
+        self.fields = None
+
+    def read(self, lines):
+        cues = CueStore()
+        pending = []
+        in_events = False
+        for line in lines:
+            line = line.rstrip('\r\n')
+            stripped = line.strip()
+            if stripped.startswith('['):
+                in_events = stripped.lower() == '[events]'
+            elif in_events and stripped.lower().startswith('format:'):
+                self.fields = [field.strip().lower() for field in stripped.split(':', 1)[1].split(',')]
+            elif in_events and self.fields and stripped.startswith('Dialogue:'):
+                values = line.split(':', 1)[1].lstrip().split(',', len(self.fields) - 1)
+                if len(values) == len(self.fields):
+                    text, markup = split_markup(values[-1], ASS_TAGS)
+                    text = text.replace('\\N', '\n').replace('\\n', '\n').replace('\\h', '\u00a0')
+                    before = "".join(f"{other}\n" for other in pending)
+                    pending = []
+                    if not len(cues):
+                        self.header, before = before, ""
+                    values[-1] = ""
+                    cues.append(len(cues) + 1, parse_timestamp(values[self.fields.index('start')]),
+                                parse_timestamp(values[self.fields.index('end')]), text, (before, tuple(values), markup))
+                    continue
+            pending.append(line)
+        
+        if not len(cues):
+            self.header = ""
+        self.footer = "".join(f"{other}\n" for other in pending)
+        return cues
+
+    def format_cue(self, cues, position, text):
+        before, values, markup = cues.extras[position]
+        values = list(values)
+        values[self.fields.index('start')] = format_ass_timestamp(cues.starts[position])
+        values[self.fields.index('end')] = format_ass_timestamp(cues.ends[position])
+        values[-1] = restore_markup(text.replace('\n', '\\N').replace('\u00a0', '\\h'), markup)
+        return f"{before}Dialogue: {','.join(values)}\n"
+
+# Function to format milliseconds as a WebVTT timestamp
+def format_vtt_timestamp(ms):
+    return '%02d:%02d:%02d.%03d' % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000)
+
+# Function to format milliseconds as an ASS timestamp, which has centisecond precision
+def format_ass_timestamp(ms):
+    return '%d:%02d:%02d.%02d' % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, ms % 1000 // 10)
+
+SUBTITLE_FORMATS = {
+    '.srt': SrtFormat,
+    '.vtt': VttFormat,
+    '.ass': AssFormat,
+    '.ssa': AssFormat,
+}
+
+# Function to pick the subtitle format from a file's extension, falling back to SRT
+def get_subtitle_format(path):
+    return SUBTITLE_FORMATS.get(pathlib.Path(path).suffix.lower(), SrtFormat)()
+
+# Generator that groups any iterable of cues into batches without materialising it
+def iter_batches(cues, batch_size=15):
+    cues = iter(cues)
+    while True:
+        batch = list(itertools.islice(cues, batch_size))
+        if not batch:
+            return
+        yield batch
 
 # Function to create batches of subtitles for translation
 def create_batches(parsed_srt, batch_size=15):
-    batches = []
-    for i in range(0, len(parsed_srt), batch_size):
-        batch = parsed_srt[i:i+batch_size]
-        batches.append(batch)
+    batches = list(iter_batches(parsed_srt, batch_size))
     
     if logger.level == logging.DEBUG:
         logger.debug(f"Created {len(batches)} batches with batch_size={batch_size}")
@@ -38,9 +842,69 @@ def create_batches(parsed_srt, batch_size=15):
     
     return batches
 
+# Packs cues into batches up to a character budget that adapts to observed latency and failures
+class AdaptiveBatcher:
+    def __init__(self, target_chars=2000, min_chars=300, max_chars=12000, target_latency=20.0, max_cues=None):
+        self.budget = target_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.target_latency = target_latency
+        self.max_cues = max_cues
+        self._lock = threading.Lock()
+
+    def iter_batches(self, cues):
+        """Generator packing cues until the current budget is used up; several generators can share one budget"""
+        batch = []
+        chars = 0
+        for item in cues:
+            size = len(item[3])
+            with self._lock:
+                full = chars + size > self.budget or (self.max_cues and len(batch) >= self.max_cues)
+            # Always take at least one cue, even if it alone is over budget
+            if batch and full:
+                yield batch
+                batch = []
+                chars = 0
+            batch.append(item)
+            chars += size
+        if batch:
+            yield batch
+
+    def record(self, latency, failed=False, missing=0):
+        """Additive increase while requests are fast and complete, multiplicative decrease otherwise"""
+        with self._lock:
+            old = self.budget
+            if failed or missing:
+                self.budget = self.budget // 2
+            elif latency > self.target_latency:
+                self.budget = int(self.budget * 0.8)
+            else:
+                self.budget = self.budget + max(100, self.budget // 10)
+            self.budget = max(self.min_chars, min(self.max_chars, self.budget))
+            
+            if logger.level == logging.DEBUG and self.budget != old:
+                logger.debug(f"Batch budget {old} -> {self.budget} characters (latency {latency:.1f}s, failed={failed}, missing={missing})")
+
+# Function to run jobs from a lazy iterator with at most `concurrency` in flight, returning results in job order
+def run_jobs(jobs, worker, concurrency=1):
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        pending = {}
+        for position, job in enumerate(jobs):
+            pending[executor.submit(worker, position, job)] = position
+            # Jobs are only pulled once a slot frees up, so lazy batchers see up-to-date feedback
+            while len(pending) >= concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+        for future, position in pending.items():
+            results[position] = future.result()
+    return [results[position] for position in range(len(results))]
+
 # Function to translate text using Openrouter.ai with Claude
-def translate_batch(batch, api_key, language):
-    url = "https://openrouter.ai/api/v1/chat/completions"
+def translate_batch(batch, api_key, language, api_url=None, model=DEFAULT_MODEL, client=None, stream=False, on_cue=None, usage=None,
+                    glossary=None):
+    url = api_url or os.environ.get('OPENROUTER_API_URL', DEFAULT_API_URL)
     
     # Create a structured format for the batch
     batch_text = ""
@@ -53,15 +917,22 @@ def translate_batch(batch, api_key, language):
         logger.debug(f"Using endpoint: {url}")
     
     headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
+        "Authorization": f"Bearer {api_key}"
     }
     
+    request = f"Translate these subtitles to {language}. Keep the format with 'SUBTITLE X:' markers:\n\n{batch_text}"
+    if glossary is not None:
+        # The cache breakpoint covers the system prompt and the glossary, which only change when new terms come in
+        content = [{"type": "text", "text": glossary.prompt(), "cache_control": {"type": "ephemeral"}},
+                   {"type": "text", "text": request}]
+    else:
+        content = request
+    
     data = {
-        "model": "anthropic/claude-3-7-sonnet",
+        "model": model,
         "messages": [
-            {"role": "system", "content": f"You are a professional subtitle translator that translates to {language}. Maintain the meaning and tone of the original text. Do not add or remove content. Return ONLY the translated text for each subtitle, keeping the 'SUBTITLE X:' format intact."},
-            {"role": "user", "content": f"Translate these subtitles to {language}. Keep the format with 'SUBTITLE X:' markers:\n\n{batch_text}"}
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": content}
         ]
     }
     
@@ -72,7 +943,19 @@ def translate_batch(batch, api_key, language):
         if logger.level == logging.DEBUG:
             logger.debug("Sending request to OpenRouter API...")
         
-        response = requests.post(url, headers=headers, data=json.dumps(data))
+        if stream:
+            # Cues are handed to on_cue as soon as the next marker arrives, long before the batch completes
+            parser = StreamingBatchParser(batch, on_cue)
+            for content in (client or get_default_client()).stream_chat(url, headers, data, usage):
+                parser.feed(content)
+            translated_content = parser.close()
+            
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Streamed response with length: {len(translated_content)} characters")
+            
+            return glossary.split_response(translated_content) if glossary is not None else translated_content
+        
+        response = (client or get_default_client()).post_json(url, headers, data)
         
         if logger.level == logging.DEBUG:
             logger.debug(f"Response status code: {response.status_code}")
@@ -89,19 +972,230 @@ def translate_batch(batch, api_key, language):
         
         translated_content = response_json["choices"][0]["message"]["content"]
         
+        if usage is not None:
+            usage.update(response_json.get('usage') or {})
+        
         if logger.level == logging.DEBUG:
             preview = translated_content[:200] + "..." if len(translated_content) > 200 else translated_content
             logger.debug(f"Translation preview: {preview}")
         
-        return translated_content
+        return glossary.split_response(translated_content) if glossary is not None else translated_content
     except Exception as e:
         logger.error(f"Error: {str(e)}")
-        if 'response' in locals():
+        # Streamed requests check the status inside stream_chat, so the response only comes with the HTTP error
+        response = locals().get('response') or getattr(e, 'response', None)
+        if response is not None:
             logger.error(response.text if hasattr(response, 'text') else "No response text")
-        return None
+        raise TranslationError(str(e), status_code=getattr(response, 'status_code', None),
+                               retry_after=parse_retry_after(response)) from e
+
+# Splits a streamed response on 'SUBTITLE N:' markers as it arrives, emitting every cue once the next marker shows up;
+# a glossary section at the end closes the last cue and is not emitted
+class StreamingBatchParser:
+    MARKER = re.compile(r'SUBTITLE (\d+):|GLOSSARY:')
+
+    def __init__(self, batch, on_cue=None):
+        self.on_cue = on_cue
+        self.expected = {item[0] for item in batch}
+        self.parts = []
+        self._buffer = ""
+
+    def _emit(self, segment):
+        match = self.MARKER.match(segment)
+        text = segment[match.end():].strip()
+        if self.on_cue is not None and text and match.group(1) is not None and match.group(1) in self.expected:
+            self.on_cue(match.group(1), text)
+
+    def feed(self, content):
+        self.parts.append(content)
+        self._buffer += content
+        markers = list(self.MARKER.finditer(self._buffer))
+        # Text between two complete markers is a finished cue; keep the last one open
+        for current, following in zip(markers, markers[1:]):
+            self._emit(self._buffer[current.start():following.start()])
+        if len(markers) > 1:
+            self._buffer = self._buffer[markers[-1].start():]
+
+    def close(self):
+        if self.MARKER.match(self._buffer):
+            self._emit(self._buffer)
+        self._buffer = ""
+        return "".join(self.parts)
+
+# Rolling glossary of names and key terms for one language, sent ahead of every batch so they are translated the
+# same way throughout the file. The model lists new terms after its translations; the first translation of a term wins.
+# Terms are only appended, so the glossary text changes as rarely as possible and stays a cacheable prompt prefix
+class Glossary:
+    MARKER = 'GLOSSARY:'
+    TERM = re.compile(r'^\s*[-*]?\s*(.+?)\s*(?:=>|->|=)\s*(.+?)\s*$')
+
+    def __init__(self, language, max_terms=200, max_term_chars=60):
+        self.language = language
+        self.max_terms = max_terms
+        self.max_term_chars = max_term_chars
+        self.terms = {}
+        self._text = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def prompt(self):
+        """The glossary block of the prompt, rebuilt only when terms were added"""
+        with self._lock:
+            if self._text is None:
+                terms = "".join(f"{source} = {target}\n" for source, target in self.terms.items())
+                self._text = (f"After the last subtitle, add a line '{self.MARKER}' followed by the proper nouns and key terms of "
+                              f"these subtitles that are not in the glossary below, one 'source = translation' per line.\n\n"
+                              f"Glossary of names and terms translated to {self.language} so far (always use these translations):\n"
+                              f"{terms or '(none yet)'}")
+            return self._text
+
+    def add(self, pairs):
+        with self._lock:
+            for source, target in pairs:
+                if source in self.terms or len(source) > self.max_term_chars or len(target) > self.max_term_chars:
+                    continue
+                if len(self.terms) >= self.max_terms:
+                    # Dropping the oldest half at once changes the cached prefix once, instead of on every new term
+                    for old in list(self.terms)[:self.max_terms // 2]:
+                        del self.terms[old]
+                self.terms[source] = target
+                self._text = None
+
+    def split_response(self, response_text):
+        """Return the subtitles part of a response, adding the terms listed after the glossary marker"""
+        subtitles, found, listed = response_text.rpartition(self.MARKER)
+        if not found:
+            return response_text
+        matches = (self.TERM.match(line) for line in listed.splitlines())
+        self.add((match.group(1), match.group(2)) for match in matches if match)
+        
+        if logger.level == logging.DEBUG:
+            logger.debug(f"Glossary for {self.language} now has {len(self.terms)} terms")
+        
+        return subtitles
 
-# Function to parse batch translation response
-def parse_batch_response(response_text, batch):
+# Writes translated cues to the output file in index order, as soon as every earlier cue is available
+class IncrementalSubtitleWriter:
+    def __init__(self, output_file, cues, subtitle_format=None):
+        self.output_file = output_file
+        self._cues = cues
+        self._format = subtitle_format or SrtFormat()
+        self._ready = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        # Cues go to a side file that only replaces the output once complete, so an interrupted
+        # run never leaves a truncated file behind that looks finished
+        self._part = output_file + '.part'
+        self._file = open(self._part, 'w', encoding='utf-8')
+        self._file.write(self._format.header)
+
+    def add(self, position, text):
+        self.add_many([(position, text)])
+
+    def add_many(self, items):
+        """Queue (cue position, translated text) pairs and write whatever is next in line"""
+        with self._lock:
+            for position, text in items:
+                self._ready.setdefault(position, text)
+            self._flush()
+
+    def _flush(self):
+        # Written cues are dropped straight away, so only out-of-order translations are held in memory
+        start = self._next
+        while self._next in self._ready:
+            self._file.write(self._format.format_cue(self._cues, self._next, self._ready.pop(self._next)))
+            self._next += 1
+        if self._next > start:
+            self._file.flush()
+
+    def close(self):
+        """Write the remaining cues, keeping the original text of any that were never translated"""
+        with self._lock:
+            for position in range(self._next, len(self._cues)):
+                self._ready.setdefault(position, self._cues.texts[position])
+            self._flush()
+            self._file.write(self._format.footer)
+            self._file.close()
+            os.replace(self._part, self.output_file)
+        
+        if logger.level == logging.DEBUG:
+            logger.debug(f"Wrote {len(self._cues)} subtitles to output file: {self.output_file}")
+
+    def abort(self):
+        """Stop writing and leave the partial output in the .part file, marking it unfinished"""
+        with self._lock:
+            self._file.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+# Translation backends: anything with translate(batch, language, usage=None, on_cue=None) returning
+# the 'SUBTITLE N:' formatted text, and raising TranslationError on failure
+class OpenRouterBackend:
+    def __init__(self, api_key, api_url=None, model=DEFAULT_MODEL, client=None, stream=False, glossary_size=None):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+        self.client = client
+        self.stream = stream
+        self.glossary_size = glossary_size
+        self.glossaries = {}
+
+    def translate(self, batch, language, usage=None, on_cue=None):
+        glossary = None
+        if self.glossary_size:
+            glossary = self.glossaries.setdefault(language, Glossary(language, self.glossary_size))
+        return translate_batch(batch, self.api_key, language, api_url=self.api_url, model=self.model, client=self.client,
+                               stream=self.stream, on_cue=on_cue, usage=usage, glossary=glossary)
+
+# Deterministic offline backend with configurable latency, error rate and dropped subtitles, for tests and benchmarks;
+# with stream=True it also hands every cue to on_cue like a streamed response would
+class MockBackend:
+    def __init__(self, latency=0.0, error_rate=0.0, drop_rate=0.0, seed=0, stream=False):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.seed = seed
+        self.stream = stream
+        self.calls = 0
+        self.attempts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def translate(self, batch, language, usage=None, on_cue=None):
+        indices = ",".join(index for index, _, _, _ in batch)
+        with self._lock:
+            self.calls += 1
+            self.attempts[language, indices] += 1
+            attempt = self.attempts[language, indices]
+        # Seeded by the batch content and how often that batch was tried, never by the global call order,
+        # so runs are reproducible whatever the thread timing
+        rng = random.Random(f"{self.seed}:{language}:{indices}:{attempt}")
+        if self.latency:
+            time.sleep(self.latency)
+        if rng.random() < self.error_rate:
+            raise TranslationError("Mock backend error", status_code=500)
+        
+        parts = []
+        code = get_language_code(language)
+        for index, _, _, text in batch:
+            if rng.random() < self.drop_rate:
+                continue
+            translated = f"[{code}] {text}"
+            parts.append(f"SUBTITLE {index}:\n{translated}\n\n")
+            if self.stream and on_cue is not None:
+                on_cue(index, translated)
+        response_text = "".join(parts)
+        
+        if usage is not None:
+            usage.update({'prompt_tokens': estimate_batch_tokens(batch) // 2, 'completion_tokens': len(response_text) // CHARS_PER_TOKEN})
+        return response_text
+
+# Function to parse batch translation response; a number that occurs more than once in the batch gets its
+# translations in order, provided all of them came back. Offsets of missing cues within the batch are added to `missing`
+def parse_batch_response(response_text, batch, missing=None):
     if logger.level == logging.DEBUG:
         logger.debug(f"Parsing translation response with length: {len(response_text)} characters")
     
@@ -121,68 +1215,88 @@ def parse_batch_response(response_text, batch):
         if i+1 < len(parts):
             subtitle_index = parts[i].strip()
             translation = parts[i+1].strip()
-            translations[subtitle_index] = translation
+            translations.setdefault(subtitle_index, []).append(translation)
             
             if logger.level == logging.DEBUG and i < 2:  # Show first item as example
                 preview = translation[:50] + "..." if len(translation) > 50 else translation
                 logger.debug(f"Parsed translation for subtitle {subtitle_index}: {preview}")
     
     if logger.level == logging.DEBUG:
-        logger.debug(f"Successfully parsed {len(translations)} subtitle translations")
-        missing = [index for index, _, _, _ in batch if index not in translations]
-        if missing:
-            logger.debug(f"Missing translations for subtitle indices: {', '.join(missing[:5])}{' and more...' if len(missing) > 5 else ''}")
+        logger.debug(f"Successfully parsed {sum(len(texts) for texts in translations.values())} subtitle translations")
+        absent = [index for index, _, _, _ in batch if index not in translations]
+        if absent:
+            logger.debug(f"Missing translations for subtitle indices: {', '.join(absent[:5])}{' and more...' if len(absent) > 5 else ''}")
+    
+    # With one of several cues of a number missing there is no telling which, so all of them count as missing
+    counts = collections.Counter(index for index, _, _, _ in batch)
+    for index, count in counts.items():
+        if count > 1 and len(translations.get(index, ())) != count:
+            translations.pop(index, None)
     
     # If some indices are missing, use placeholder
     result = []
-    for index, start_time, end_time, text in batch:
-        if index in translations:
-            result.append((index, start_time, end_time, translations[index]))
+    for offset, (index, start_time, end_time, text) in enumerate(batch):
+        translation = translations[index].pop(0) if translations.get(index) else None
+        if translation:
+            result.append((index, start_time, end_time, translation))
+        elif missing is not None:
+            # The caller re-queues these, so keep the original text only as a placeholder
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Missing or empty translation for subtitle {index}, it will be retried")
+            result.append((index, start_time, end_time, text))
+            missing.append(offset)
         else:
             logger.warning(f"Missing translation for subtitle {index}. Using original text.")
             result.append((index, start_time, end_time, text))
     
     return result
 
+LANGUAGE_CODES = {
+    'italian': 'it',
+    'french': 'fr',
+    'spanish': 'es',
+    'german': 'de',
+    'portuguese': 'pt',
+    'dutch': 'nl',
+    'russian': 'ru',
+    'japanese': 'ja',
+    'chinese': 'zh',
+    'korean': 'ko',
+    'arabic': 'ar',
+    'hindi': 'hi',
+    'swedish': 'sv',
+    'finnish': 'fi',
+    'danish': 'da',
+    'norwegian': 'no',
+    'polish': 'pl',
+    'turkish': 'tr', 
+    'czech': 'cs',
+    'greek': 'el',
+    'hungarian': 'hu',
+    'romanian': 'ro',
+    'thai': 'th',
+    'ukrainian': 'uk',
+    'vietnamese': 'vi',
+    'english': 'en'
+    # Add more languages as needed
+}
+
 # Function to get language code
 def get_language_code(language):
-    language_codes = {
-        'italian': 'it',
-        'french': 'fr',
-        'spanish': 'es',
-        'german': 'de',
-        'portuguese': 'pt',
-        'dutch': 'nl',
-        'russian': 'ru',
-        'japanese': 'ja',
-        'chinese': 'zh',
-        'korean': 'ko',
-        'arabic': 'ar',
-        'hindi': 'hi',
-        'swedish': 'sv',
-        'finnish': 'fi',
-        'danish': 'da',
-        'norwegian': 'no',
-        'polish': 'pl',
-        'turkish': 'tr', 
-        'czech': 'cs',
-        'greek': 'el',
-        'hungarian': 'hu',
-        'romanian': 'ro',
-        'thai': 'th',
-        'ukrainian': 'uk',
-        'vietnamese': 'vi',
-        'english': 'en'
-        # Add more languages as needed
-    }
-    
-    code = language_codes.get(language.lower(), language.lower()[:2])
+    code = LANGUAGE_CODES.get(language.lower(), language.lower()[:2])
     
     if logger.level == logging.DEBUG:
         logger.debug(f"Language code for '{language}': {code}")
     
     return code
 
+# Function to get the language name from a code such as 'it', so the prompt names the language
+def get_language_name(language):
+    for name, code in LANGUAGE_CODES.items():
+        if language.lower() == code:
+            return name.capitalize()
+    return language
+
 # Function to generate output filename
 def generate_output_filename(input_file, language):
     language_code = get_language_code(language)
@@ -221,15 +1335,164 @@ def generate_output_filename(input_file, language):
     
     return result
 
-# Main process
-def translate_srt(input_file, output_file=None, api_key=None, language='Italian', batch_size=15):
+# Function to translate one batch with backoff, returning the translated items and the cues that still need translating,
+# each as (offset in the batch, cue) pairs, and whether those cues are worth re-queueing: a batch that failed as a whole
+# has used up its attempts already, so its cues are not
+def translate_batch_with_retries(batch, backend, language, limiter, i, total_batches=None, max_retries=3, retry_delay=2,
+                                 batcher=None, on_cue=None, metrics=None):
+    logger.info(f"Translating batch {i+1}{f'/{total_batches}' if total_batches else ''} ({len(batch)} subtitles)")
+    
+    if logger.level == logging.DEBUG:
+        batch_indices = [item[0] for item in batch]
+        logger.debug(f"Batch {i+1} contains subtitle indices: {', '.join(batch_indices[:5])}{' and more...' if len(batch_indices) > 5 else ''}")
+    
+    for attempt in range(max_retries):
+        retry_after = None
+        started = time.monotonic()
+        try:
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Translation attempt {attempt+1}/{max_retries} for batch {i+1}")
+            
+            limiter.acquire(estimate_batch_tokens(batch))
+            started = time.monotonic()
+            usage = {}
+            translated_batch_text = backend.translate(batch, language, usage=usage, on_cue=on_cue)
+            latency = time.monotonic() - started
+            if metrics is not None:
+                metrics.record_request(latency, usage=usage)
+            
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Translation successful for batch {i+1}, parsing response")
+            
+            missing = []
+            translated_items = parse_batch_response(translated_batch_text, batch, missing)
+            if batcher is not None:
+                batcher.record(latency, missing=len(missing))
+            
+            # Only the cues that came back missing or empty are handed back for another try
+            missing = set(missing)
+            translated = [(offset, item) for offset, item in enumerate(translated_items) if offset not in missing]
+            failed = [(offset, batch[offset]) for offset in sorted(missing)]
+            if failed:
+                logger.warning(f"Batch {i+1}: {len(failed)} subtitles missing from the response, re-queueing them")
+            return translated, failed, True
+        except Exception as e:
+            if batcher is not None:
+                batcher.record(time.monotonic() - started, failed=True)
+            if metrics is not None:
+                metrics.record_request(time.monotonic() - started, ok=False)
+            logger.error(f"Error processing batch: {str(e)}")
+            logger.info(f"Attempt {attempt+1}/{max_retries}")
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Exception details: {type(e).__name__}: {str(e)}")
+            
+            if isinstance(e, TranslationError):
+                retry_after = e.retry_after
+                if e.status_code == 429 or retry_after is not None:
+                    # The whole account is being throttled, not just this request
+                    limiter.pause(backoff_delay(attempt, retry_delay, retry_after=retry_after))
+                elif e.status_code is not None and 400 <= e.status_code < 500 and e.status_code != 408:
+                    # A bad key or a rejected request fails the same way every time
+                    logger.error(f"Failed to translate batch {i+1}: HTTP {e.status_code} is not retried, keeping the original text.")
+                    return [], list(enumerate(batch)), False
+        
+        if attempt < max_retries - 1:
+            if metrics is not None:
+                metrics.record_retry()
+            delay = backoff_delay(attempt, retry_delay, retry_after=retry_after)
+            if logger.level == logging.DEBUG:
+                logger.debug(f"Waiting {delay:.1f}s before retrying batch {i+1}")
+            time.sleep(delay)
+    
+    logger.error(f"Failed to translate batch {i+1} after {max_retries} attempts, keeping the original text.")
+    return [], list(enumerate(batch)), False
+
+# Function to normalise subtitle text so that near-identical repeats share one translation
+def normalize_cue_text(text):
+    return " ".join(unicodedata.normalize('NFKC', text).split())
+
+# Function to collapse repeated subtitles into one representative each; returns the positions of the
+# unique cues, the positions of the repeats of every representative, and the estimated tokens saved
+def dedupe_cues(cues, positions):
+    unique = array('q')
+    duplicates = {}
+    representatives = {}
+    saved_tokens = 0
+    
+    for position in positions:
+        text = cues.texts[position]
+        key = normalize_cue_text(text)
+        representative = representatives.get(key)
+        if representative is None:
+            representatives[key] = position
+            unique.append(position)
+        else:
+            duplicates.setdefault(representative, []).append(position)
+            saved_tokens += 2 * (len(text) + 16) // CHARS_PER_TOKEN
+    
+    if logger.level == logging.DEBUG:
+        logger.debug(f"Deduplicated {len(positions)} subtitles into {len(unique)} unique texts")
+    
+    return unique, duplicates, saved_tokens
+
+# Function to split cues into cached translations, keyed by position, and the positions of cues that still need the API
+def lookup_cache(cues, cache, language, model):
+    cached = {}
+    to_translate = array('q', range(len(cues)))
+    if cache is not None:
+        to_translate = array('q')
+        for position, text in enumerate(cues.texts):
+            translation = cache.get(text, language, model)
+            if translation is None:
+                to_translate.append(position)
+            else:
+                cached[position] = translation
+        logger.info(f"Translation cache ({language}): {len(cached)} hits, {len(to_translate)} misses")
+    return cached, to_translate
+
+# Generator that tags each batch of a language with its language, number and the store positions of its cues
+# (batches are taken in order from the cues at `positions`), topping batches up with (position, cue) pairs
+# waiting in the retry queue
+def language_jobs(language, batches, positions, retry_queue=None, start=0):
+    offset = 0
+    for i, batch in enumerate(batches, start):
+        batch_positions = list(positions[offset:offset + len(batch)])
+        offset += len(batch)
+        if retry_queue:
+            batch = list(batch)
+            for _ in range(max(1, len(batch) // 2)):
+                try:
+                    position, item = retry_queue.popleft()
+                except IndexError:
+                    break
+                batch.append(item)
+                batch_positions.append(position)
+        yield language, i, batch, batch_positions
+
+# Generator that takes one job from each language in turn, so all languages progress together
+def interleave(job_lists):
+    iterators = [iter(jobs) for jobs in job_lists]
+    while iterators:
+        for iterator in list(iterators):
+            job = next(iterator, None)
+            if job is None:
+                iterators.remove(iterator)
+            else:
+                yield job
+
+# Main process: translate one file into several languages, sharing parsing, batching, scheduler and rate limiter
+def translate_srt_multi(input_file, languages, api_key=None, batch_size=15, concurrency=1, requests_per_second=0.5,
+                        tokens_per_minute=None, api_url=None, retry_delay=2, model=DEFAULT_MODEL, cache=None,
+                        batch_chars=None, output_files=None, journal=True, client=None, max_cue_retries=3, stream=False,
+                        metrics=None, backend=None, dedupe=True, glossary_size=None):
     if logger.level == logging.DEBUG:
         logger.debug(f"Starting translation process for {input_file}")
-        logger.debug(f"Parameters: language={language}, batch_size={batch_size}")
+        logger.debug(f"Parameters: languages={languages}, batch_size={batch_size}, batch_chars={batch_chars}, concurrency={concurrency}")
+        logger.debug(f"Rate limits: requests_per_second={requests_per_second}, tokens_per_minute={tokens_per_minute}")
         logger.debug(f"API key present: {'Yes' if api_key else 'No'}")
     
     # Get API key from environment if not provided
-    if not api_key:
+    if backend is None and not api_key:
         api_key = os.environ.get('OPENROUTER_API_KEY')
         if logger.level == logging.DEBUG:
             logger.debug(f"Using API key from environment: {'Found' if api_key else 'Not found'}")
@@ -237,98 +1500,289 @@ def translate_srt(input_file, output_file=None, api_key=None, language='Italian'
         if not api_key:
             raise ValueError("API key is required. Please provide it as an argument or set the OPENROUTER_API_KEY environment variable.")
     
-    # Generate output filename if not provided
-    if not output_file:
-        output_file = generate_output_filename(input_file, language)
-        logger.info(f"Auto-generated output filename: {output_file}")
+    if backend is None:
+        client = client or get_default_client()
+        backend = OpenRouterBackend(api_key, api_url=api_url, model=model, client=client, stream=stream, glossary_size=glossary_size)
     
-    if logger.level == logging.DEBUG:
-        logger.debug(f"Reading input file: {input_file}")
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        srt_content = f.read()
+    # Generate output filenames if not provided
+    output_files = dict(output_files or {})
+    for language in languages:
+        if not output_files.get(language):
+            output_files[language] = generate_output_filename(input_file, language)
+            logger.info(f"Auto-generated output filename: {output_files[language]}")
     
     if logger.level == logging.DEBUG:
-        logger.debug(f"Read {len(srt_content)} characters from input file")
+        logger.debug(f"Reading input file: {input_file}")
     
-    parsed_srt = parse_srt(srt_content)
-    batches = create_batches(parsed_srt, batch_size)
+    # Styling tags are taken out here, so they cost no tokens, and the writers put them back
+    subtitle_format = get_subtitle_format(input_file)
+    with open(input_file, 'r', encoding='utf-8-sig', newline='') as f:
+        parsed_srt = subtitle_format.read(f)
     
     if logger.level == logging.DEBUG:
-        logger.debug(f"Parsed {len(parsed_srt)} subtitles, divided into {len(batches)} batches")
+        logger.debug(f"Read {len(parsed_srt)} {subtitle_format.name} subtitle entries from input file, {len(parsed_srt.extras)} with tags or settings")
     
-    translated_srt = []
-    total_batches = len(batches)
+    limiter = RateLimiter(requests_per_second, tokens_per_minute)
+    if metrics is None:
+        metrics = RunMetrics(model)
+    batcher = AdaptiveBatcher(target_chars=batch_chars) if batch_chars else None
+    shared_dedup = None
+    duplicates = {}
+    writers = {}
+    journals = {}
+    retry_queues = {language: collections.deque() for language in languages}
+    cue_attempts = collections.Counter()
+    progress = {}
+    job_lists = []
     
-    for i, batch in enumerate(batches):
-        logger.info(f"Translating batch {i+1}/{total_batches} ({len(batch)} subtitles)")
+    try:
+        for language in languages:
+            cached, to_translate = lookup_cache(parsed_srt, cache, language, model)
+            if cache is not None:
+                metrics.record_cache(len(cached), len(to_translate))
+            
+            if journal:
+                journals[language] = TranslationJournal(output_files[language] + '.journal', file_fingerprint(input_file, language, model))
+                if journals[language].completed:
+                    cached.update(journals[language].completed)
+                    to_translate = array('q', (position for position in to_translate if position not in journals[language].completed))
+            
+            # The output grows as translations arrive, so finished work is visible before the run ends
+            writers[language] = IncrementalSubtitleWriter(output_files[language], parsed_srt, subtitle_format)
+            for position, translation in cached.items():
+                writers[language].add(position, translation)
+            
+            # Blank cues have nothing to translate and would only come back empty, so they go straight to the output
+            blank = [position for position in to_translate if not parsed_srt.texts[position].strip()]
+            if blank:
+                writers[language].add_many((position, parsed_srt.texts[position]) for position in blank)
+                to_translate = array('q', (position for position in to_translate if parsed_srt.texts[position].strip()))
+            
+            duplicates[language] = {}
+            if dedupe:
+                # Repeats only cost one translation, which is then copied to every occurrence
+                if not cached:
+                    if shared_dedup is None:
+                        shared_dedup = dedupe_cues(parsed_srt, to_translate)
+                    to_translate, duplicates[language], saved_tokens = shared_dedup
+                else:
+                    to_translate, duplicates[language], saved_tokens = dedupe_cues(parsed_srt, to_translate)
+                repeats = sum(len(positions) for positions in duplicates[language].values())
+                if repeats:
+                    logger.info(f"{language}: {repeats} repeated subtitles collapsed into {len(duplicates[language])} translations, ~{saved_tokens} tokens saved")
+                metrics.record_dedup(repeats, saved_tokens)
+            
+            # Cue tuples are only built as batches are taken, so every language can batch the same store cheaply
+            if batcher is not None:
+                # Batches are packed lazily so each one uses the budget adapted from the batches before it
+                batches = batcher.iter_batches(parsed_srt.cues(to_translate))
+                total_batches = None
+            else:
+                batches = iter_batches(parsed_srt.cues(to_translate), batch_size)
+                total_batches = (len(to_translate) + batch_size - 1) // batch_size
+            
+            progress[language] = {'total': total_batches, 'done': 0, 'started': None, 'finished': None}
+            job_lists.append(language_jobs(language, batches, to_translate, retry_queues[language]))
         
-        if logger.level == logging.DEBUG:
-            batch_indices = [item[0] for item in batch]
-            logger.debug(f"Batch {i+1} contains subtitle indices: {', '.join(batch_indices[:5])}{' and more...' if len(batch_indices) > 5 else ''}")
+        progress_lock = threading.Lock()
         
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                if logger.level == logging.DEBUG:
-                    logger.debug(f"Translation attempt {attempt+1}/{max_retries} for batch {i+1}")
-                
-                translated_batch_text = translate_batch(batch, api_key, language)
-                
-                if translated_batch_text:
-                    if logger.level == logging.DEBUG:
-                        logger.debug(f"Translation successful for batch {i+1}, parsing response")
-                    
-                    translated_items = parse_batch_response(translated_batch_text, batch)
-                    
-                    for index, start_time, end_time, translated_text in translated_items:
-                        translated_srt.append(f"{index}\n{start_time} --> {end_time}\n{translated_text}\n\n")
-                        
-                        if logger.level == logging.DEBUG and len(translated_srt) <= 3:  # Show first few as examples
-                            preview = translated_text[:50] + "..." if len(translated_text) > 50 else translated_text
-                            logger.debug(f"Added translation for subtitle {index}: {preview}")
-                    
-                    break  # Success, exit retry loop
+        def emit(language, position, text):
+            """Write a translation for a cue and all its repeats; returns the (position, text) pairs written"""
+            written = [(position, text)] + [(duplicate, text) for duplicate in duplicates[language].get(position, ())]
+            writers[language].add_many(written)
+            return written
+        
+        def run(job_number, job):
+            language, i, batch, positions = job
+            with progress_lock:
+                if progress[language]['started'] is None:
+                    progress[language]['started'] = time.monotonic()
+            
+            # Streamed cues only carry their subtitle number; a number that repeats within the batch
+            # can't tell its cues apart, so those wait for the parsed response
+            streamable = {}
+            for item, position in zip(batch, positions):
+                streamable[item[0]] = None if item[0] in streamable else position
+            streamed = set()
+            
+            def on_cue(index, text):
+                position = streamable.get(index)
+                # A retried attempt streams the same cues again
+                if position is not None and position not in streamed:
+                    streamed.add(position)
+                    emit(language, position, text)
+            
+            translated_items, failed, requeue = translate_batch_with_retries(batch, backend, get_language_name(language), limiter, i, progress[language]['total'],
+                                                                    retry_delay=retry_delay, batcher=batcher, on_cue=on_cue, metrics=metrics)
+            written = []
+            pending = []
+            for offset, (_, _, _, translated_text) in translated_items:
+                position = positions[offset]
+                pairs = [(position, translated_text)] + [(duplicate, translated_text) for duplicate in duplicates[language].get(position, ())]
+                written.extend(pairs)
+                # Cues that were streamed (and their repeats) are already in the output
+                if position not in streamed:
+                    pending.extend(pairs)
+            writers[language].add_many(pending)
+            if cache is not None:
+                cache.put_many([(batch[offset][3], translated_text) for offset, (_, _, _, translated_text) in translated_items], language, model)
+            if journal:
+                journals[language].append(written)
+            
+            given_up = 0
+            for offset, item in failed:
+                position = positions[offset]
+                with progress_lock:
+                    cue_attempts[language, position] += 1
+                    give_up = not requeue or cue_attempts[language, position] >= max_cue_retries
+                if give_up:
+                    if requeue:
+                        logger.warning(f"Missing translation for subtitle {item[0]} after {max_cue_retries} attempts. Using original text.")
+                    emit(language, position, item[3])
+                    given_up += 1
                 else:
-                    logger.warning(f"Batch translation failed. Attempt {attempt+1}/{max_retries}")
-                    time.sleep(5)  # Wait before retrying
-            except Exception as e:
-                logger.error(f"Error processing batch: {str(e)}")
-                logger.info(f"Attempt {attempt+1}/{max_retries}")
-                if logger.level == logging.DEBUG:
-                    logger.debug(f"Exception details: {type(e).__name__}: {str(e)}")
-                time.sleep(5)
-        else:  # This runs if the for loop completes without a break
-            logger.error(f"Failed to translate batch {i+1} after {max_retries} attempts. Using original text.")
-            for index, start_time, end_time, text in batch:
-                translated_srt.append(f"{index}\n{start_time} --> {end_time}\n{text}\n\n")
-                if logger.level == logging.DEBUG:
-                    logger.debug(f"Using original text for subtitle {index}")
+                    retry_queues[language].append((position, item))
+            metrics.record_cues(language, len(translated_items), len(failed) - given_up, given_up)
+            
+            with progress_lock:
+                state = progress[language]
+                state['done'] += 1
+                state['finished'] = time.monotonic()
+                if len(languages) > 1:
+                    logger.info(f"{language}: {state['done']}{'/' + str(state['total']) if state['total'] else ''} batches done")
+            # Translations already went to the writer; returning them would keep every batch alive until the end
+            return len(translated_items)
         
-        # Add delay to avoid rate limiting
-        if i < total_batches - 1:  # No need to delay after the last batch
-            if logger.level == logging.DEBUG:
-                logger.debug("Waiting between batches to avoid rate limiting...")
-            time.sleep(2)
+        if logger.level == logging.DEBUG and concurrency > 1:
+            logger.debug(f"Translating with {concurrency} concurrent requests")
+        
+        run_jobs(interleave(job_lists), run, concurrency)
+        
+        # Whatever is still queued once the regular batches are done gets batches of its own;
+        # every round increases the attempt counts, so this ends after at most max_cue_retries rounds
+        while any(retry_queues.values()):
+            job_lists = []
+            for language in languages:
+                leftovers = list(retry_queues[language])
+                retry_queues[language].clear()
+                if leftovers:
+                    logger.info(f"{language}: retrying {len(leftovers)} subtitles")
+                    progress[language]['total'] = None
+                    positions = [position for position, _ in leftovers]
+                    # Retried cues are packed like the first pass, so they keep to the same size limit
+                    items = [item for _, item in leftovers]
+                    batches = batcher.iter_batches(items) if batcher is not None else iter_batches(items, batch_size)
+                    job_lists.append(language_jobs(language, batches, positions, start=progress[language]['done']))
+            
+            run_jobs(interleave(job_lists), run, concurrency)
+        
+        for language in languages:
+            writers[language].close()
+            if journal:
+                journals[language].remove()
+            state = progress[language]
+            elapsed = state['finished'] - state['started'] if state['started'] is not None else 0.0
+            logger.info(f"{language}: {state['done']} batches translated in {elapsed:.1f}s, saved to {output_files[language]}")
+            glossary = getattr(backend, 'glossaries', {}).get(get_language_name(language))
+            if glossary is not None:
+                logger.info(f"{language}: glossary of {len(glossary)} names and terms")
+    finally:
+        # An error escaping from here must not leave files open; unfinished outputs stay in their .part files
+        for writer in writers.values():
+            if not writer.closed:
+                writer.abort()
+        for language_journal in journals.values():
+            language_journal.close()
     
-    if logger.level == logging.DEBUG:
-        logger.debug(f"Writing {len(translated_srt)} translated subtitles to output file: {output_file}")
+    if cache is not None:
+        logger.info(f"Translation cache totals: {cache.hits} hits, {cache.misses} misses")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("".join(translated_srt))
+    report = metrics.report()
+    cost = f", estimated cost ${report['estimated_cost_usd']:.4f}" if report['estimated_cost_usd'] is not None else ""
+    logger.info(f"Run: {report['cues_translated']} subtitles translated at {report['cues_per_second']:.1f}/s, {report['requests']} requests, "
+                f"{report['retries']} retries, tokens in/out {report['prompt_tokens']}/{report['completion_tokens']} "
+                f"({report['cached_prompt_tokens']} prompt tokens cached){cost}")
+    
+    timing = client.timing_summary() if client is not None else None
+    if timing:
+        logger.info(f"HTTP: {timing['requests']} requests over {timing['new_connections']} new connections, "
+                    f"mean connect {timing['mean_connect']*1000:.0f}ms, TTFB {timing['mean_ttfb']*1000:.0f}ms, total {timing['mean_total']*1000:.0f}ms")
     
     if logger.level == logging.DEBUG:
-        logger.debug(f"Translation completed successfully. Output saved to: {output_file}")
+        logger.debug(f"Translation completed successfully. Output saved to: {', '.join(output_files[language] for language in languages)}")
+    
+    return output_files
+
+# Function to translate a single file into a single language
+def translate_srt(input_file, output_file=None, api_key=None, language='Italian', batch_size=15, **kwargs):
+    output_files = translate_srt_multi(input_file, [language], api_key, batch_size, output_files={language: output_file}, **kwargs)
+    return output_files[language]
+
+# Function to translate every subtitle file below a directory, one file after the other;
+# without a pattern every file with a supported extension (SRT, WebVTT, ASS/SSA) is picked up
+def translate_directory(input_dir, languages, api_key=None, batch_size=15, pattern=None, overwrite=False, **kwargs):
+    target_codes = {get_language_code(language) for language in languages}
+    queue = []
+    
+    for path in sorted(pathlib.Path(input_dir).rglob(pattern or '*')):
+        if pattern is None and path.suffix.lower() not in SUBTITLE_FORMATS:
+            continue
+        # Skip files we produced ourselves on an earlier run
+        parts = path.stem.split('.')
+        if len(parts) > 1 and parts[-1] in target_codes:
+            continue
+        
+        pending = [language for language in languages
+                   if overwrite or not os.path.exists(generate_output_filename(path, language))
+                   or os.path.exists(generate_output_filename(path, language) + '.journal')
+                   or os.path.exists(generate_output_filename(path, language) + '.part')]
+        if pending:
+            queue.append((path, pending))
+    
+    logger.info(f"Queued {len(queue)} files for translation from {input_dir}")
     
-    return output_file
+    results = {}
+    failed = []
+    for n, (path, pending) in enumerate(queue):
+        logger.info(f"File {n+1}/{len(queue)}: {path}")
+        try:
+            results[str(path)] = translate_srt_multi(str(path), pending, api_key, batch_size, **kwargs)
+        except Exception as e:
+            # Keep going; the journal lets a later run pick this file up where it stopped
+            logger.error(f"Failed to translate {path}: {str(e)}")
+            failed.append(str(path))
+    
+    logger.info(f"Translated {len(results)} files, {len(failed)} failed")
+    return results, failed
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Translate SRT subtitles using AI')
-    parser.add_argument('--input', required=True, help='Input SRT file')
-    parser.add_argument('--output', help='Output SRT file (optional, will be auto-generated if not provided)')
+    parser = argparse.ArgumentParser(description='Translate SRT, WebVTT and ASS/SSA subtitles using AI')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help='Input subtitle file (.srt, .vtt, .ass or .ssa)')
+    source.add_argument('--input_dir', help='Translate every subtitle file found below this directory')
+    parser.add_argument('--output', help='Output file, written in the format of the input (optional, will be auto-generated if not provided)')
     parser.add_argument('--api_key', help='OpenRouter API key (can also use OPENROUTER_API_KEY env variable)')
     parser.add_argument('--language', default='Italian', help='Target language (default: Italian)')
+    parser.add_argument('--languages', help='Comma separated target languages or codes, e.g. it,fr,de (overrides --language and --output)')
     parser.add_argument('--batch_size', type=int, default=15, help='Number of subtitles per batch (default: 15)')
+    parser.add_argument('--batch_chars', type=int, help='Pack batches up to this many characters and adapt the budget to latency and failures, instead of a fixed batch_size (optional)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of batch requests kept in flight (default: 1)')
+    parser.add_argument('--requests_per_second', type=float, default=0.5, help='Maximum API requests per second, 0 for no limit (default: 0.5)')
+    parser.add_argument('--tokens_per_minute', type=int, help='Estimated token budget per minute (optional)')
+    parser.add_argument('--api_url', help='Chat completions endpoint (can also use OPENROUTER_API_URL env variable)')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'Model used for translation (default: {DEFAULT_MODEL})')
+    parser.add_argument('--cache', help='Path of an SQLite translation memory reused across runs (optional)')
+    parser.add_argument('--cache_size', type=int, default=100000, help='Maximum number of cached translations before LRU eviction (default: 100000)')
+    parser.add_argument('--stream', action='store_true', help='Use streamed completions and write each subtitle as soon as it arrives')
+    parser.add_argument('--glossary', action='store_true', help='Keep a rolling glossary of names and terms, sent with every batch as a cacheable prompt prefix')
+    parser.add_argument('--glossary_size', type=int, default=200, help='Maximum number of glossary terms per language (default: 200)')
+    parser.add_argument('--no_dedupe', action='store_true', help='Send every repeated subtitle to the model instead of translating it once')
+    parser.add_argument('--pool_size', type=int, help='Maximum number of kept-alive HTTP connections (default: concurrency, at least 10)')
+    parser.add_argument('--compress', action='store_true', help='Gzip request bodies')
+    parser.add_argument('--report', help='Write a JSON run report (latency histogram, tokens, retries, cache hits, cost) to this file')
+    parser.add_argument('--prometheus', help='Write the run metrics in Prometheus text format to this file')
+    parser.add_argument('--overwrite', action='store_true', help='With --input_dir, also translate files whose output already exists')
+    parser.add_argument('--no_journal', action='store_true', help='Do not keep a journal of completed batches for resuming')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     
     args = parser.parse_args()
@@ -345,5 +1799,35 @@ if __name__ == "__main__":
         logger.error("Error: API key is required. Please provide it with --api_key or set the OPENROUTER_API_KEY environment variable.")
         exit(1)
     
-    output_file = translate_srt(args.input, args.output, api_key, args.language, args.batch_size)
-    logger.info(f"Translation completed! Output saved to {output_file}")
\ No newline at end of file
+    cache = TranslationCache(args.cache, args.cache_size) if args.cache else None
+    client = TranslationClient(pool_size=args.pool_size or max(10, args.concurrency), compress=args.compress)
+    metrics = RunMetrics(args.model)
+    options = dict(client=client, metrics=metrics, concurrency=args.concurrency, requests_per_second=args.requests_per_second,
+                   tokens_per_minute=args.tokens_per_minute, api_url=args.api_url,
+                   model=args.model, cache=cache, batch_chars=args.batch_chars, journal=not args.no_journal,
+                   stream=args.stream, dedupe=not args.no_dedupe, glossary_size=args.glossary_size if args.glossary else None)
+    
+    try:
+        if args.input_dir:
+            languages = [language.strip() for language in (args.languages or args.language).split(',') if language.strip()]
+            results, failed = translate_directory(args.input_dir, languages, api_key, args.batch_size, overwrite=args.overwrite, **options)
+            output_file = f"{len(results)} files below {args.input_dir}"
+            if failed:
+                logger.error(f"Failed files: {', '.join(failed)}")
+        elif args.languages:
+            languages = [language.strip() for language in args.languages.split(',') if language.strip()]
+            output_files = translate_srt_multi(args.input, languages, api_key, args.batch_size, **options)
+            output_file = ', '.join(output_files.values())
+        else:
+            output_file = translate_srt(args.input, args.output, api_key, args.language, args.batch_size, **options)
+    finally:
+        client.close()
+        if cache is not None:
+            cache.close()
+        if args.report:
+            metrics.write_json(args.report)
+        if args.prometheus:
+            with open(args.prometheus, 'w', encoding='utf-8') as f:
+                f.write(metrics.to_prometheus())
+    
+    logger.info(f"Translation completed! Output saved to {output_file}")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  benchmark_wordle.py
+#
+#  Times the vectorised parts of wordle_modeller against the
+#  original pure Python ones, checking that they give the same results
+#
+
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import wordle_modeller
+from wordle_modeller import wordle_solver, pattern_to_code, ALPHABET, ITALIAN_ALPHABET
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def bench_feedback(g, guesses):
+    '''
+    compare_words on every guess/answer pair against one feedback call per guess
+    '''
+    def python():
+        return [[pattern_to_code(g.compare_words(guess, answer)['pattern']) for answer in g._dictionary] for guess in guesses]
+
+    def vectorised():
+        return [g.feedback(guess).tolist() for guess in guesses]
+
+    pairs = len(guesses) * len(g._dictionary)
+    t_python, expected = timed(python)
+    t_numpy, result = timed(vectorised)
+    print ('feedback, %s pairs: compare_words %.3fs (%.0f pairs/s), vectorised %.4fs (%.0f pairs/s), %.0fx faster, identical: %s'
+           % (pairs, t_python, pairs / t_python, t_numpy, pairs / t_numpy, t_python / t_numpy, expected == result))
+
+def bench_ranking(g, samples=200):
+    '''
+    frequency_rank on the whole dictionary, then rankings of random candidate sets:
+    counted from scratch, derived from the dictionary statistics by subtraction and memoized
+    '''
+    t_full, _ = timed(lambda: g.frequency_rank(limit=None))
+    sets = [sorted(random.sample(range(len(g._dictionary)), random.randint(2, len(g._dictionary)))) for _ in range(samples)]
+    t_words, expected = timed(lambda: [g.frequency_rank([g._dictionary[i] for i in found]) for found in sets])
+    g._ranks = {}
+    t_stats, result = timed(lambda: [[g._dictionary[i] for i in g.rank_candidates(found)[0][:50]] for found in sets])
+    t_memo, _ = timed(lambda: [g.rank_candidates(found) for found in sets])
+    print ('frequency_rank of the whole dictionary in %.4fs; %s candidate sets: frequency_rank %.3fs, rank_candidates %.3fs, memoized %.4fs, identical: %s'
+           % (t_full, samples, t_words, t_stats, t_memo, expected == result))
+
+def bench_evaluate(g, start_with, exclude=0):
+    '''
+    every answer played once with solve against the shared guess tree of evaluate
+    '''
+    t_solve, expected = timed(lambda: [g.solve(guess_word=word, start_with=start_with, exclude=exclude)['attempts'] for word in g._dictionary])
+    t_tree, result = timed(lambda: g.evaluate(start_with, exclude=exclude))
+    print ('all %s answers from %s: one solve per word %.2fs, evaluate %.2fs (%s guesses chosen), identical: %s, success rate %.3f, mean %.3f'
+           % (len(g._dictionary), start_with, t_solve, t_tree, result['nodes'], expected == result['profile'].tolist(), result['success_rate'], result['mean']))
+
+def bench_loading(args, repeats=5):
+    '''
+    creating a solver from the text word lists, from their binary cache, and again in the same process
+    (best of repeats)
+    '''
+    def create(cache_dir, shared):
+        if not shared:
+            wordle_modeller._word_lists.clear()
+            wordle_modeller._guess_lists.clear()
+        return timed(lambda: wordle_solver(args.dict_file, args.word_length, guess_file=args.guess_file, cache_dir=cache_dir, alphabet=args.alphabet))[0]
+    
+    times = []
+    for cached, shared in ((False, False), (True, False), (True, True)):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            if cached: create(cache_dir, False)
+            times.append(min(create(cache_dir if cached else os.path.join(cache_dir, str(n)), shared) for n in range(repeats)))
+    print ('solver created from the text files in %.4fs, from the cached word lists in %.4fs, sharing them in %.4fs'
+           % tuple(times))
+
+def bench_matrix(args):
+    '''
+    building the pattern matrix from scratch, then loading it from the cache in a new solver
+    '''
+    with tempfile.TemporaryDirectory() as cache_dir:
+        g = wordle_solver(args.dict_file, args.word_length, guess_file=args.guess_file, cache_dir=cache_dir, alphabet=args.alphabet)
+        t_build, patterns = timed(lambda: g.patterns)
+        print ('pattern matrix %s x %s: built in %.2fs' % (patterns.shape[0], patterns.shape[1], t_build))
+        
+        t_init, g = timed(lambda: wordle_solver(args.dict_file, args.word_length, guess_file=args.guess_file, cache_dir=cache_dir, alphabet=args.alphabet))
+        t_load, patterns = timed(lambda: g.patterns)
+        print ('new solver: created in %.3fs, cached matrix mapped in %.4fs' % (t_init, t_load))
+        
+        pairs = [(random.choice(g._guesses), random.choice(g._dictionary)) for _ in range(10000)]
+        t_python, expected = timed(lambda: [pattern_to_code(g.compare_words(guess, word)['pattern']) for guess, word in pairs])
+        t_lookup, result = timed(lambda: [g.pattern_code(guess, word) for guess, word in pairs])
+        print ('10000 single pairs: compare_words %.3fs, matrix lookup %.3fs, identical: %s' % (t_python, t_lookup, expected == result))
+        
+        bench_strategies(g)
+        bench_tree(g, os.path.join(cache_dir, 'tree.json.gz'), args.processes or None)
+
+def bench_strategies(g):
+    '''
+    one decision over all guesses and answers, then every answer played, for each scored strategy
+    '''
+    for method in ('entropy', 'minimax'):
+        t_decision, guess = timed(lambda: g.best_guess(method=method))
+        t_evaluate, result = timed(lambda: g.evaluate(strategy=method))
+        print ('%s: first guess %s chosen from %s x %s in %.3fs; all answers played in %.2fs, success rate %.3f, mean %.3f, distribution %s'
+               % (method, guess, len(g._guesses), len(g._dictionary), t_decision, t_evaluate, result['success_rate'], result['mean'], result['distribution']))
+
+def bench_tree(g, filename, processes=1):
+    '''
+    building the entropy decision tree, then every answer replayed from the saved tree
+    '''
+    #from scratch, without the decisions memoized by bench_strategies
+    g._best_guesses = {}
+    t_build, tree = timed(lambda: g.build_tree(strategy='entropy', processes=processes))
+    g.save_tree(filename)
+    print ('decision tree: %s guesses built on %s processes in %.2fs, %.1f KB saved'
+           % (len(tree['tree']), processes or os.cpu_count(), t_build, os.path.getsize(filename) / 1e3))
+    
+    g.tree = None
+    t_load, _ = timed(lambda: g.load_tree(filename))
+    t_evaluate, result = timed(lambda: g.evaluate(strategy='tree'))
+    t_solve, profile = timed(lambda: [g.solve(guess_word=word, strategy='tree')['attempts'] for word in g._dictionary])
+    print ('tree loaded in %.4fs; all answers played in %.4fs with evaluate, %.4fs with one solve per word, identical: %s, mean %.3f'
+           % (t_load, t_evaluate, t_solve, profile == result['profile'].tolist(), result['mean']))
+
+def bench_solve(g, games, processes=1, seed=0):
+    '''
+    whole games with the default strategy, where candidate filtering dominates
+    '''
+    t_solve, result = timed(lambda: g.solve_many(use_smart=True, N_GAMES=games, processes=processes, seed=seed))
+    print ('\nsolve_many: %s games on %s processes in %.2fs (%.0f games/s), success rate %.3f'
+           % (games, processes or os.cpu_count(), t_solve, games / t_solve, result['success_rate']))
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the wordle solver')
+    parser.add_argument('--dict_file', default='wordle_words.txt', help='Word list (default: wordle_words.txt)')
+    parser.add_argument('--guess_file', help='Extra words accepted as guesses, e.g. wordle_words_accepted.txt (optional)')
+    parser.add_argument('--guesses', type=int, default=50, help='Number of random guesses to compare against the whole word list (default: 50)')
+    parser.add_argument('--games', type=int, default=500, help='Number of games to time with solve (default: 500)')
+    parser.add_argument('--processes', type=int, default=1, help='Processes used by solve_many, 0 for all cores (default: 1)')
+    parser.add_argument('--start_with', help='Starting word for the exhaustive evaluation (default: ARISE for 5 letter words, otherwise the first common word)')
+    parser.add_argument('--word_length', type=int, default=5, help='Length of the words, 4 to 8 (default: 5)')
+    parser.add_argument('--alphabet', default=ALPHABET, help='Letters of the words (default: A-Z; "italian" adds the accented vowels)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+    if args.alphabet.lower() == 'italian':
+        args.alphabet = ITALIAN_ALPHABET
+
+    random.seed(args.seed)
+    g = wordle_solver(args.dict_file, args.word_length, alphabet=args.alphabet)
+    bench_feedback(g, random.sample(g._dictionary, args.guesses))
+    bench_ranking(g)
+    bench_solve(g, args.games, args.processes or None, args.seed)
+    bench_evaluate(g, args.start_with or ('ARISE' if args.word_length == 5 else g.common_words[0]))
+    bench_loading(args)
+    bench_matrix(args)
@@ -24,10 +24,15 @@
 
 # uses https://github.com/dwyl/english-words/blob/master/words_alpha.txt as wordlist
 
+import os
+import json
+import gzip
 import random
+import hashlib
+import multiprocessing
 
 from operator import and_, or_, contains
-from functools import reduce
+from functools import reduce, lru_cache
 
 import numpy as np
 
@@ -49,7 +54,7 @@ def formatgametohtml(game):
     
     TABLE = ''
     for (word, pattern) in game:
-        TABLE += '<game-row letters="%s" length="5"><div class="row">' % word
+        TABLE += '<game-row letters="%s" length="%s"><div class="row">' % (word, len(word))
         for (letter, match) in zip (word, pattern):
             if match.isupper(): evaluation = 'correct'
             elif match.islower(): evaluation = 'present'
@@ -58,29 +63,427 @@ def formatgametohtml(game):
         TABLE += '</div></game-row>'
 
     return HTML_HEAD + TABLE + HTML_FOOT
+
+#feedback codes: every letter of the guess is a base-3 digit, first letter most significant
+GREY, YELLOW, GREEN = 0, 1, 2
+
+#letters of the words, in the order of their indices; any other set of up to 64 uppercase
+#letters can be used instead, e.g. ITALIAN_ALPHABET for lists with accented vowels
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+ITALIAN_ALPHABET = ALPHABET + 'ÀÈÉÌÒÓÙ'
+
+#encoding of the characters that are not in the alphabet, never found in a dictionary word
+OUTSIDE = 254
+
+@lru_cache()
+def letter_table(alphabet=ALPHABET):
+    '''
+    lookup table from character code to letter index, OUTSIDE for characters not in the alphabet
+    '''
+    if len(set(alphabet)) != len(alphabet) or len(alphabet) > 64:
+        raise ValueError('The alphabet must have up to 64 different letters')
+    table = np.full(max(map(ord, alphabet)) + 1, OUTSIDE, dtype=np.uint8)
+    table[[ord(letter) for letter in alphabet]] = np.arange(len(alphabet))
+    table.setflags(write=False)
+    return table
+
+def encode_words(words, alphabet=ALPHABET):
+    '''
+    encode a list of uppercase words of the same length as an (N, length) uint8 array
+    of letter indices in the alphabet (A = 0 ... Z = 25 by default)
+    '''
+    length = len(words[0]) if len(words) else 0
+    table = letter_table(alphabet)
+    characters = np.frombuffer("".join(words).encode('utf-32-le'), dtype=np.uint32)
+    encoded = np.where(characters < len(table), table[np.minimum(characters, len(table) - 1)], OUTSIDE).astype(np.uint8)
+    return encoded.reshape(len(words), length)
+
+def decode_words(encoded, alphabet=ALPHABET):
+    '''
+    the words of an (N, length) array of letter indices, as encode_words would take them
+    '''
+    text = np.array([ord(letter) for letter in alphabet], dtype=np.uint32)[encoded].tobytes().decode('utf-32-le')
+    return [text[i:i + encoded.shape[1]] for i in range(0, len(text), encoded.shape[1])]
+
+def index_words(encoded, alphabet_size=26):
+    '''
+    search index of encoded words: the letter bitmask of every word (bit k set if letter k is in it,
+    uint64 for alphabets of more than 32 letters), the (N, alphabet_size) count of each letter
+    in every word, and whether a word repeats any letter; characters outside the alphabet are left out
+    '''
+    counts = np.zeros((len(encoded), alphabet_size), dtype=np.uint8)
+    rows = np.arange(len(encoded))
+    for i in range(encoded.shape[1]):
+        #every row appears once per position, so plain indexing adds up correctly
+        inside = encoded[:, i] < alphabet_size
+        counts[rows[inside], encoded[inside, i]] += 1
+    dtype = np.uint32 if alphabet_size <= 32 else np.uint64
+    masks = ((counts > 0) * (np.ones(1, dtype=dtype) << np.arange(alphabet_size, dtype=dtype))).sum(axis=1, dtype=dtype)
+    return masks, counts, (counts > 1).any(axis=1)
+
+def feedback_codes(guess, answers):
+    '''
+    vectorised version of wordle_solver.compare_words: the pattern of one encoded guess
+    against every encoded answer at once, as an array of base-3 codes (see pattern_to_code)
+    
+    the rules are exactly those of compare_words: green letters are taken out of the answer,
+    then any other letter of the guess still found in the answer is yellow,
+    however many times it appears
+    '''
+    green = answers == guess
+    remaining = np.where(green, 255, answers)
+    codes = np.zeros(len(answers), dtype=np.uint8 if 3 ** answers.shape[1] <= 256 else np.uint16)
+    for i in range(answers.shape[1]):
+        codes *= 3
+        codes += np.where(green[:, i], GREEN, (remaining == guess[i]).any(axis=1)).astype(codes.dtype)
+    return codes
+
+def feedback_matrix(guesses, answers, out=None, chunk=512):
+    '''
+    feedback codes of every encoded guess (G, length) against every encoded answer (N, length)
+    as a (G, N) matrix, the same as calling feedback_codes once per guess
+    guesses are processed in chunks to keep memory use bounded; out can be a memory-mapped array
+    '''
+    length = answers.shape[1]
+    dtype = np.uint8 if 3 ** length <= 256 else np.uint16
+    if out is None:
+        out = np.empty((len(guesses), len(answers)), dtype=dtype)
+    
+    for start in range(0, len(guesses), chunk):
+        block = guesses[start:start + chunk]
+        green = block[:, None, :] == answers[None, :, :]
+        codes = np.zeros((len(block), len(answers)), dtype=dtype)
+        for i in range(length):
+            #a letter is yellow if it matches a letter of the answer that is not green
+            present = np.zeros(codes.shape, dtype=bool)
+            for j in range(length):
+                present |= (block[:, i, None] == answers[None, :, j]) & ~green[:, :, j]
+            codes *= 3
+            codes += np.where(green[:, :, i], GREEN, present).astype(dtype)
+        out[start:start + chunk] = codes
+    
+    return out
+
+def bucket_counts(patterns, n_codes, columns=None, chunk=2048):
+    '''
+    for every row (guess) of a (G, N) pattern matrix, how many of the answers get each of the n_codes feedback codes
+    columns optionally restricts the answers to these indices; rows are processed in chunks to bound memory
+    '''
+    counts = np.empty((len(patterns), n_codes), dtype=np.int32)
+    for start in range(0, len(patterns), chunk):
+        block = patterns[start:start + chunk]
+        block = np.asarray(block if columns is None else block[:, columns], dtype=np.int32)
+        offsets = np.arange(len(block), dtype=np.int32)[:, None] * n_codes
+        counts[start:start + chunk] = np.bincount((block + offsets).ravel(), minlength=len(block) * n_codes).reshape(len(block), n_codes)
+    return counts
+
+def score_guesses(patterns, n_codes, columns=None, method='entropy'):
+    '''
+    score every row (guess) of a (G, N) pattern matrix by how it splits the answers (or the columns given),
+    higher is better
+    entropy: expected information, in bits, given by the feedback
+    minimax: minus the number of answers left in the worst case
+    '''
+    if method not in ('entropy', 'minimax'):
+        raise ValueError('Unknown method %s, use entropy or minimax' % method)
     
+    n = patterns.shape[1] if columns is None else len(columns)
+    #few answers: for each answer count the answers getting the same code, rather than counting every code
+    pairwise = n * n <= n_codes
+    #rows are scored in chunks, so longer words (3 ** 8 codes) do not need a (G, n_codes) table
+    chunk = max(1, 2 ** 22 // (n * n if pairwise else n + n_codes))
+    scores = np.empty(len(patterns))
+    
+    for start in range(0, len(patterns), chunk):
+        if pairwise:
+            block = np.asarray(patterns[start:start + chunk, columns] if columns is not None else patterns[start:start + chunk])
+            sizes = (block[:, :, None] == block[:, None, :]).sum(axis=2)
+            if method == 'entropy':
+                scores[start:start + chunk] = np.log2(n) - np.log2(sizes).mean(axis=1)
+            else:
+                scores[start:start + chunk] = -sizes.max(axis=1)
+        else:
+            counts = bucket_counts(patterns[start:start + chunk], n_codes, columns)
+            if method == 'entropy':
+                scores[start:start + chunk] = np.log2(n) - (counts * np.log2(np.maximum(counts, 1))).sum(axis=1) / n
+            else:
+                scores[start:start + chunk] = -counts.max(axis=1)
+    
+    return scores
+
+def pattern_to_code(pattern):
+    '''
+    base-3 code of a pattern in the compare_words format, e.g. 'PA_n_'
+    '''
+    code = 0
+    for c in pattern:
+        code = code * 3 + (GREEN if c.isupper() else YELLOW if c.islower() else GREY)
+    return code
+
+def code_to_pattern(code, guess):
+    '''
+    pattern in the compare_words format for the given code and guess
+    '''
+    pattern = ''
+    for i, letter in enumerate(guess):
+        digit = code // 3 ** (len(guess) - i - 1) % 3
+        pattern += letter.upper() if digit == GREEN else letter.lower() if digit == YELLOW else '_'
+    return pattern
+    
+
+class letter_stats:
+    '''
+    letter statistics of a set of encoded words: how many times each letter appears
+    at each position, as a (word_length, alphabet_size) matrix
+    computed once for the whole dictionary; the statistics of a subset are then obtained
+    by subtracting the words taken out (see keep)
+    '''
+    def __init__(self, encoded, counts, words=None, positions=None):
+        self._encoded = encoded
+        self._counts = counts
+        self.words = np.arange(len(encoded)) if words is None else np.asarray(words)
+        self.positions = self._position_counts(self.words) if positions is None else positions
+
+    def _position_counts(self, words):
+        positions = np.empty((self._encoded.shape[1], self._counts.shape[1]), dtype=np.int64)
+        for i in range(self._encoded.shape[1]):
+            positions[i] = np.bincount(self._encoded[words, i], minlength=self._counts.shape[1])
+        return positions
+
+    @property
+    def totals(self):
+        '''
+        how many times each letter appears in the words, in any position
+        '''
+        return self.positions.sum(axis=0)
+
+    def keep(self, words):
+        '''
+        statistics of a subset of the words: the counts of the words left out are subtracted,
+        unless counting the subset from scratch takes fewer words
+        '''
+        words = np.asarray(words)
+        if 2 * len(words) >= len(self.words):
+            positions = self.positions - self._position_counts(np.setdiff1d(self.words, words, assume_unique=True))
+        else:
+            positions = self._position_counts(words)
+        return letter_stats(self._encoded, self._counts, words, positions)
+
+    def scores(self):
+        '''
+        score of every word: the sum over its letters of how many times they appear in the words
+        '''
+        return self._counts[self.words] @ self.totals
+
+#word lists loaded in this process, and the guesses of every pair of lists, shared by all the solvers using them
+_word_lists = {}
+_guess_lists = {}
+
+class word_list:
+    '''
+    the words of one length and alphabet in a word list file, uppercase and in file order, with their
+    encoding (see encode_words), search index (see index_words) and letter statistics
+    the arrays are read only, as the same word_list is shared by every solver using the file
+    '''
+    def __init__(self, filename, encoded, sha1, alphabet=ALPHABET):
+        self.filename = filename
+        self.sha1 = sha1
+        self.alphabet = alphabet
+        self.encoded = encoded
+        length = encoded.shape[1]
+        self.words = decode_words(encoded, alphabet)
+        self._index = None
+        self.masks, self.counts, self.repeats = index_words(encoded, len(alphabet))
+        #every word as a number in base len(alphabet), and the same id for repeated words
+        self.numbers = encoded @ len(alphabet) ** np.arange(length - 1, -1, -1, dtype=np.int64)
+        _, first, self.word_ids = np.unique(self.numbers, return_index=True, return_inverse=True)
+        self.duplicates = len(first) < len(self.words)
+        for array in (self.encoded, self.masks, self.counts, self.repeats, self.numbers, self.word_ids):
+            array.setflags(write=False)
+        self.stats = letter_stats(self.encoded, self.counts)
+
+    @property
+    def index(self):
+        '''
+        position of every word in the list (of the last one, for repeated words)
+        '''
+        if self._index is None:
+            self._index = {word: i for i, word in enumerate(self.words)}
+        return self._index
+
+def read_words(filename, word_length, alphabet=ALPHABET):
+    '''
+    select words by length from a complete dictionary, leaving out words with letters outside the alphabet
+    '''
+    with open(filename, encoding='utf-8') as df:
+        all_words = df.readlines()
+    
+    letters = set(alphabet)
+    words = [word.strip().upper() for word in all_words]
+    return [word for word in words if len(word) == word_length and letters.issuperset(word)]
+
+def load_words(filename, word_length=5, cache_dir=None, alphabet=ALPHABET):
+    '''
+    the word_list of the words of word_length in filename written with the letters of alphabet
+    
+    the encoded words are cached in cache_dir as an (N, word_length) .npy, with a .json holding
+    the size, modification time and sha1 of the file they were read from: the text is only read
+    again when size or modification time change, and encoded again only when the content did
+    every word length and alphabet has its own cache; within a process every file is loaded
+    once per length and alphabet and its word_list shared
+    '''
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (path, word_length, alphabet, stat.st_size, stat.st_mtime_ns)
+    if key in _word_lists:
+        return _word_lists[key]
+    
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), '.wordle_cache')
+    name = os.path.splitext(os.path.basename(path))[0]
+    base = os.path.join(cache_dir, 'words_%s_%s_%s' % (name, word_length, hashlib.sha1(('%s:%s' % (path, alphabet)).encode()).hexdigest()[:8]))
+    try:
+        with open(base + '.json') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    
+    if meta.get('size') == stat.st_size and meta.get('mtime_ns') == stat.st_mtime_ns:
+        encoded = np.load(base + '.npy')
+        sha1 = meta['sha1']
+    else:
+        with open(path, 'rb') as f:
+            sha1 = hashlib.sha1(f.read()).hexdigest()
+        if meta.get('sha1') == sha1:
+            #touched but not changed
+            encoded = np.load(base + '.npy')
+        else:
+            encoded = encode_words(read_words(path, word_length, alphabet), alphabet).reshape(-1, word_length)
+            os.makedirs(cache_dir, exist_ok=True)
+            #written under a temporary name, so an interrupted save never leaves a broken cache
+            tmp_path = '%s.%s.tmp.npy' % (base, os.getpid())
+            np.save(tmp_path, encoded)
+            os.replace(tmp_path, base + '.npy')
+        
+        #the metadata is written last, so it never describes an older .npy
+        tmp_path = '%s.%s.tmp' % (base, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'file' : path, 'word_length' : word_length, 'alphabet' : alphabet, 'size' : stat.st_size, 'mtime_ns' : stat.st_mtime_ns, 'sha1' : sha1}, f)
+        os.replace(tmp_path, base + '.json')
+    
+    _word_lists[key] = word_list(path, encoded, sha1, alphabet)
+    return _word_lists[key]
 
 class wordle_solver:
 
-    def __init__(self, dict_file = "words_alpha.txt", word_length=5, common_words=20):
+    #bump when the way the pattern matrix is computed changes, so old caches are not used
+    CACHE_VERSION = 1
+
+    def __init__(self, dict_file = "words_alpha.txt", word_length=5, common_words=20, guess_file=None, cache_dir=None, alphabet=ALPHABET):
+        '''
+        dict_file holds the possible answers; guess_file optionally adds words that are
+        accepted as guesses but are never the answer (e.g. wordle_words_accepted.txt)
+        only the words of word_length written with the letters of alphabet are used
+        (e.g. ITALIAN_ALPHABET to keep the words with accented vowels)
+        the word lists and the pattern matrix are cached in cache_dir (default: .wordle_cache next to dict_file),
+        separately for every word length and alphabet
+        '''
+        self.dict_file = dict_file
+        self.guess_file = guess_file
+        self.word_length = word_length
+        self.alphabet = alphabet.upper()
+        self._letter_index = {letter: i for i, letter in enumerate(self.alphabet)}
+        letter_table(self.alphabet)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(dict_file)), '.wordle_cache')
         
         self._refresh_dictionary(dict_file, word_length)
         self.common_words = self.frequency_rank(limit=common_words, exclude_repeats=True)
 
     def _refresh_dictionary (self, dict_file, word_length):
-        self._dictionary = self.get_words(dict_file, word_length)
+        #the word lists, their indexes and letter statistics are shared with other solvers using the same files
+        self._answers = load_words(dict_file, word_length, self.cache_dir, self.alphabet)
+        self._dictionary = self._answers.words
+        self._encoded = self._answers.encoded
+        self._masks, self._counts, self._repeats = self._answers.masks, self._answers.counts, self._answers.repeats
+        self._word_ids, self._duplicates = self._answers.word_ids, self._answers.duplicates
+        self.stats = self._answers.stats
+        
+        #answers come first, so the first rows of the pattern matrix are the answers as guesses
+        self._extra = load_words(self.guess_file, word_length, self.cache_dir, self.alphabet) if self.guess_file else None
+        key = (id(self._answers), id(self._extra))
+        if key not in _guess_lists:
+            if self._extra is None:
+                _guess_lists[key] = self._answers
+            else:
+                #the first time each extra word appears, if it is not an answer already
+                first = np.sort(np.unique(self._extra.word_ids, return_index=True)[1])
+                first = first[~np.isin(self._extra.numbers[first], self._answers.numbers)]
+                _guess_lists[key] = word_list(None, np.concatenate([self._encoded, self._extra.encoded[first]]), None, self.alphabet)
+        self._guess_list = _guess_lists[key]
+        self._guesses = self._guess_list.words
+        
+        self._patterns = None
+        self._best_guesses = {}
+        self.tree = None
+        self._ranks = {}
+        self._dictionary_rank = None
         print ('Loaded dictionary with %s words' % len(self._dictionary))
+
+    @property
+    def _answer_index(self):
+        return self._answers.index
+
+    @property
+    def _guess_index(self):
+        return self._guess_list.index
+
+    def _cache_key(self):
+        '''
+        hash of the word lists and settings the pattern matrix depends on
+        '''
+        key = hashlib.sha1(('%s:%s:%s:' % (self.CACHE_VERSION, self.word_length, self.alphabet)).encode())
+        for words in (self._answers, self._extra):
+            if words is not None:
+                key.update(words.sha1.encode())
+            key.update(b'\0')
+        return key.hexdigest()[:16]
+
+    @property
+    def patterns(self):
+        '''
+        (guesses x answers) matrix of feedback codes, rows in the order of self._guesses
+        and columns in the order of the dictionary
+        computed once per set of word lists, then memory-mapped from the cache on first use
+        '''
+        if self._patterns is None:
+            path = os.path.join(self.cache_dir, 'patterns_%s.npy' % self._cache_key())
+            
+            if not os.path.exists(path):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                #written under a temporary name, so an interrupted build never leaves a broken cache
+                tmp_path = '%s.%s.tmp' % (path, os.getpid())
+                dtype = np.uint8 if 3 ** self.word_length <= 256 else np.uint16
+                matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=(len(self._guesses), len(self._dictionary)))
+                feedback_matrix(self._guess_list.encoded, self._encoded, out=matrix)
+                matrix.flush()
+                del matrix
+                os.replace(tmp_path, path)
+                print ('Saved %s x %s pattern matrix to %s' % (len(self._guesses), len(self._dictionary), path))
+            
+            self._patterns = np.load(path, mmap_mode='r')
+        
+        return self._patterns
+
+    def pattern_code(self, guess, word):
+        '''
+        feedback code of guess against word, looked up in the pattern matrix
+        '''
+        return int(self.patterns[self._guess_index[guess.upper()], self._answer_index[word.upper()]])
     
     def get_words(self, dict_file, word_length):
         '''
         select words by length from a complete dictionary
         '''
-        with open(dict_file) as df:
-            all_words = df.readlines()
-        
-        words = [word.strip().upper() for word in all_words if (len(word.strip()) == 5)]
-        
-        return words
+        return list(load_words(dict_file, word_length, self.cache_dir, self.alphabet).words)
 
     def containsAll(self, word, letters):
         return reduce(and_, map(contains, len(letters)*[word], letters))
@@ -96,7 +499,64 @@ class wordle_solver:
         '''
         return random.choice(self.common_words)
 
-    def pick_random_word(self, wordlist=None, has_letters=None, hasnot_letters=None, pattern=None, norepeats=False, verbose=False):
+    def letters_mask(self, letters):
+        '''
+        bitmask of the given letters; letters outside the alphabet are ignored
+        '''
+        mask = 0
+        for letter in letters.upper():
+            if letter in self._letter_index:
+                mask |= 1 << self._letter_index[letter]
+        return mask
+
+    def filter_candidates(self, candidates=None, has_letters=None, hasnot_letters=None, pattern=None, norepeats=False, wordlist=None):
+        '''
+        indices of the words of the dictionary (or of wordlist) satisfying the requirements
+        described in pick_random_word
+        
+        candidates are the indices left after a previous round: as requirements only ever add up
+        during a game, passing them (with just the newest pattern) narrows the search to those words
+        instead of going through the whole dictionary again
+        '''
+        if wordlist is None:
+            encoded, masks, repeats = self._encoded, self._masks, self._repeats
+        else:
+            encoded = encode_words([word.upper() for word in wordlist], self.alphabet)
+            masks, _, repeats = index_words(encoded, len(self.alphabet))
+        
+        found = np.arange(len(masks)) if candidates is None else np.asarray(candidates)
+        
+        if has_letters:
+            has_mask = self.letters_mask(has_letters)
+            if any(letter not in self._letter_index for letter in has_letters.upper()):
+                #no word can contain a letter outside the alphabet
+                return found[:0]
+            found = found[(masks[found] & has_mask) == has_mask]
+        
+        if hasnot_letters:
+            #letters that are also in has_letters are in contrast with it and are not excluded
+            hasnot_mask = self.letters_mask(hasnot_letters) & ~self.letters_mask(has_letters or '')
+            found = found[(masks[found] & hasnot_mask) == 0]
+        
+        if norepeats:
+            found = found[~repeats[found]]
+        
+        if pattern:
+            if type(pattern) == str: pattern = [pattern]
+            for pat in pattern:
+                for i, c in enumerate(pat[:encoded.shape[1]]):
+                    letter = self._letter_index.get(c.upper())
+                    if c.isupper():
+                        found = found[encoded[found, i] == letter] if letter is not None else found[:0]
+                    elif c.islower():
+                        #same letter, different position
+                        if letter is None:
+                            return found[:0]
+                        found = found[(encoded[found, i] != letter) & ((masks[found] >> masks.dtype.type(letter)) & 1 == 1)]
+        
+        return found
+
+    def pick_random_word(self, wordlist=None, has_letters=None, hasnot_letters=None, pattern=None, norepeats=False, verbose=False, candidates=None):
         '''
         picks a random word from the dictionary
         the word must contain the letters provided in has
@@ -105,116 +565,49 @@ class wordle_solver:
             uppercase letter means same letter, same position
             lowercase letter means same letter, different position
             _ means letter not present
+        candidates optionally restricts the search to these indices (see filter_candidates)
         '''
         
-        if has_letters:
-            #remove non unique occurances
-            has_letters = "".join(set(has_letters.upper())) 
-        
-        if hasnot_letters:
-            #remove non unique occurances
-            hasnot_letters = "".join(set(hasnot_letters.upper())) 
-
-        if has_letters and hasnot_letters:
-            #removing letters that are in contrast with the has_letter command
-            hasnot_letters = "".join([letter for letter in hasnot_letters if letter not in has_letters])
-        
         if wordlist == None:
-            wordlist = self._dictionary.copy()
+            wordlist = self._dictionary
         
-        continue_search = has = hasnot = matches = hasrepeats = True
-        i = 0
-
         if verbose: print ('Looking for word that has [%s] and has not [%s] with pattern [%s]' % (has_letters, hasnot_letters, pattern))
 
-        found_words = []
-        
-        for word in wordlist:
-
-        #while continue_search:
-            #try:
-            #    word = random.choice(wordlist)
-            #    wordlist.remove(rw)
-            #except:
-            #    #no word match these requirements
-            #    return ''
-            
-            i += 1
-            txt = ''
-
-            if has_letters:
-                has = self.containsAll(word, has_letters)
-                txt += ' contains all letters in %s' % has_letters.upper()
-                
-            if hasnot_letters:
-                hasnot = not self.containsAny(word, hasnot_letters.upper())
-                txt += ' does not contain any letter in %s' % hasnot_letters.upper()
-
-            if pattern:
-                if type(pattern) == str: pattern = [pattern]
-                for pat in pattern:
-                    green = all ([(c[0].upper() == c[1].upper()) for c in zip(pat, word) if c[0].isupper()])
-                    yellow = all ([((c[0].upper() != c[1].upper()) and (c[0].upper() in word)) for c in zip(pat, word) if c[0].islower()])
-                    matches = green and yellow
-                    if not matches: break
-                    txt += ' matches tha pattern %s' % pat
-                    
-
-            continue_search = (has == False) or (hasnot == False) or (matches == False) or (norepeats and self.hasRepeatingCharacters(word))
-            if not continue_search: found_words.append(word)
-
+        found = self.filter_candidates(candidates, has_letters, hasnot_letters, pattern, norepeats, wordlist=None if wordlist is self._dictionary else wordlist)
+        found_words = [wordlist[i] for i in found]
 
-        if verbose: print (word + txt + ' found in %s attempts' % i)
+        if verbose: print ('%s words found out of %s' % (len(found_words), len(wordlist) if candidates is None else len(candidates)))
         return random.choice(found_words), self.frequency_rank(found_words)
 
     def analyse_frequency(self, wordlist = None, ascount=True):
         '''
         Analyse the frequency of letters in the given dictionary
+        returns how many times each letter appears, overall and at each position, as dictionaries
+        sorted by count (letters with the same count in order of appearance), or as fractions if not ascount
         '''
 
-        def sorted_dict(d, reverse=False):
-            return dict(sorted(d.items(), key=lambda item: item[1], reverse=False))
-
-        def counttofrequency(d):
-            count = 0
-            total = 0
-            
-            for letter in d:
-                count = d[letter]
-                total += count
-                
-            for letter in d:
-                d[letter] = d[letter] / total
-            
+        def to_dict(letters, counts):
+            d = dict(sorted(((self.alphabet[k], int(counts[k])) for k in letters if k < len(self.alphabet)), key=lambda item: item[1]))
+            if not ascount:
+                total = sum(d.values())
+                d = {letter : count / total for letter, count in d.items()}
             return d
 
-        if wordlist == None:
-            wordlist = self._dictionary
+        if wordlist is None:
+            encoded, stats = self._encoded, self.stats
+        else:
+            encoded = encode_words([word.strip().upper() for word in wordlist], self.alphabet)
+            stats = letter_stats(encoded, index_words(encoded, len(self.alphabet))[1])
         
-        distribution = {}
+        #letters in order of first appearance, reading word by word
+        _, first = np.unique(encoded.ravel(), return_index=True)
+        distribution = to_dict(encoded.ravel()[np.sort(first)], stats.totals)
         position = []
+        for i in range(encoded.shape[1]):
+            _, first = np.unique(encoded[:, i], return_index=True)
+            position.append(to_dict(encoded[np.sort(first), i], stats.positions[i]))
         
-        for word in wordlist:
-            i = 0
-            for letter in word.strip():
-                try:
-                    distribution[letter] += 1
-                    position[i][letter] += 1
-                except:
-                    distribution.update({letter : 1})
-                    try:
-                        position[i].update({letter : 1})
-                    except:
-                        position.append({letter : 1})
-                i+=1
-                
-        #absolute count
-        if ascount:
-            return sorted_dict(distribution), [sorted_dict(pos) for pos in position]
-        
-        #or relative frequency?
-        else:
-            return counttofrequency(sorted_dict(distribution)), [counttofrequency(sorted_dict(pos)) for pos in position]
+        return distribution, position
 
     def compare_words(self, guess, word):
         '''
@@ -267,51 +660,117 @@ class wordle_solver:
 
         return result
 
+    def feedback(self, guess, wordlist=None):
+        '''
+        pattern codes of guess against every word of the wordlist (default: the dictionary)
+        same result as calling compare_words on each word, but computed in one go
+        (or read from the pattern matrix, once that has been loaded)
+        '''
+        if wordlist is None and self._patterns is not None and guess.upper() in self._guess_index:
+            return np.asarray(self.patterns[self._guess_index[guess.upper()]])
+        answers = self._encoded if wordlist is None else encode_words([word.upper() for word in wordlist], self.alphabet)
+        return feedback_codes(encode_words([guess.upper()], self.alphabet)[0], answers)
+
+    def _answer_codes(self, guess, answers):
+        '''
+        feedback codes of guess against the dictionary words at the given indices
+        '''
+        if self._patterns is not None and guess in self._guess_index:
+            return np.asarray(self._patterns[self._guess_index[guess], answers])
+        return feedback_codes(encode_words([guess], self.alphabet)[0], self._encoded[answers])
+
+    def best_guess(self, candidates=None, method='entropy'):
+        '''
+        the allowed guess (from the dictionary and guess_file) that best splits the candidates,
+        the dictionary indices of the words still possible, by expected information (entropy)
+        or by the size of the largest group left (minimax)
+        
+        all guesses are scored at once from the pattern matrix; on equal scores a guess that
+        may itself be the answer is preferred. Decisions are memoized by candidate set
+        '''
+        candidates = np.arange(len(self._dictionary)) if candidates is None else np.asarray(candidates)
+        if len(candidates) <= 2:
+            #guessing one of the candidates is as good as it gets
+            return self._dictionary[candidates[0]]
+        
+        key = (method, candidates.tobytes())
+        if key not in self._best_guesses:
+            columns = None if len(candidates) == len(self._dictionary) else candidates
+            scores = score_guesses(self.patterns, 3 ** self.word_length, columns, method)
+            #the first rows of the matrix are the dictionary, so the candidates' rows are their indices
+            scores[candidates] += 1e-6
+            self._best_guesses[key] = self._guesses[int(scores.argmax())]
+        
+        return self._best_guesses[key]
+
     def check_rank (self, word, wordllist=None):
         '''
         Check how the word ranks on the wordlist
         '''
-        allwords = self.frequency_rank(limit=None, descending=True)
-        rank = {k:i for i,k in enumerate(allwords.keys())}
+        if self._dictionary_rank is None:
+            self._dictionary_rank = {self._dictionary[i]: n for n, i in enumerate(self.rank_candidates()[0])}
+        rank = self._dictionary_rank
         
         try:
             return { word.upper(): rank[word.upper()], 'total' : len(rank) }
         except:
-            return { word.upper(): 'not found', 'total' : len(allwords) }
+            return { word.upper(): 'not found', 'total' : len(rank) }
 
     def frequency_rank(self, wordlist=None, limit=50, exclude_repeats=False, descending=True):
+        '''
+        words of the wordlist (default: the dictionary) sorted by the sum over their letters of
+        how many times each letter appears in the whole wordlist; words with the same score keep
+        the order of the wordlist and repeated words are listed once
+        returns the first limit words, or with limit=None a dictionary of every word and its score
+        '''
+        if wordlist is None:
+            words, counts = self._dictionary, self._counts
+        else:
+            words = [word.strip().upper() for word in wordlist]
+            index = [self._answer_index.get(word) for word in words]
+            counts = self._counts[index] if None not in index else index_words(encode_words(words, self.alphabet), len(self.alphabet))[1]
         
-        from itertools import islice
-
-        def _take(n, iterable):
-            "Return first n items of the iterable as a list"
-            return list(islice(iterable, n))
+        keep = np.arange(len(words))
+        if exclude_repeats:
+            keep = keep[(counts[keep] <= 1).all(axis=1)]
         
-        fr, position = self.analyse_frequency(wordlist)
-        result = {}
+        scores = counts[keep] @ counts.sum(axis=0, dtype=np.int64)
+        order = np.argsort(-scores if descending else scores, kind='stable')
         
-        if wordlist == None:
-            wordlist = self._dictionary
-
-        if exclude_repeats:
-            wordlist = [word for word in wordlist if not self.hasRepeatingCharacters(word)]
-
-        for word in wordlist:
-            score = 0
-            for letter in word.strip():
-                score += fr[letter]
-            result[word.strip().upper()] = score
-
-        sorted_result = dict(sorted(result.items(), key=lambda item: item[1], reverse=descending))
+        result = {}
+        for i, score in zip(keep[order].tolist(), scores[order].tolist()):
+            result.setdefault(words[i], score)
+            if limit and len(result) == limit: break
         
         if limit:
-            return _take(limit, sorted_result.keys())
+            return list(result)
         else:
-            return sorted_result
+            return result
 
-    def solve (self, guess_word=None, use_smart=True, start_with=None, stupid_mode=False, attempts=6, exclude=0):
+    def rank_candidates(self, candidates=None, stats=None):
+        '''
+        the candidates (dictionary indices in dictionary order, default: all) ranked as frequency_rank
+        ranks their words, together with their letter_stats
+        stats of a larger set the candidates were taken from, e.g. those of the previous round,
+        are updated by subtraction instead of counting again; rankings are memoized by candidate set
+        '''
+        candidates = np.arange(len(self._dictionary)) if candidates is None else np.asarray(candidates)
+        key = candidates.tobytes()
+        if key not in self._ranks:
+            stats = (stats or self.stats).keep(candidates)
+            ranked = candidates[np.argsort(-stats.scores(), kind='stable')]
+            if self._duplicates:
+                ranked = ranked[np.sort(np.unique(self._word_ids[ranked], return_index=True)[1])]
+            self._ranks[key] = ranked, stats
+        
+        return self._ranks[key]
+
+    def solve (self, guess_word=None, use_smart=True, start_with=None, stupid_mode=False, attempts=6, exclude=0, strategy='frequency'):
         '''
         Solve a single game
+        strategy 'frequency' refines guesses by letter frequency as below; 'entropy' and 'minimax'
+        always play best_guess over the words still possible (use_smart, stupid_mode and exclude do not apply)
+        and 'tree' replays the decision tree in use (see build_tree), one lookup per round
         '''
         
         game = []
@@ -324,6 +783,11 @@ class wordle_solver:
         else:
             p = guess_word
 
+        if strategy == 'tree':
+            return self._solve_tree(p, attempts)
+        if strategy != 'frequency':
+            return self._solve_scored(p, start_with, strategy, attempts)
+
         if start_with:
             #start with the provided word
             first_attempt = start_with
@@ -377,11 +841,17 @@ class wordle_solver:
         
         #ALL OTHER ROUNDS
         #for the remaining attempts try to guess using the information gathered so far
+        #every round only narrows down the words left from the round before
+        candidates = None
+        stats = None
         for a in range(attempts - (excluded + 1)):
             
             pattern_history = [p for _,p in game]
-            w, possibilities_left = self.pick_random_word (pattern=pattern_history, hasnot_letters=hasnot, has_letters=has)
-            if len(possibilities_left) > 1: w = possibilities_left[0]
+            candidates = self.filter_candidates(candidates, pattern=pattern_history if candidates is None else pattern_history[-1:], hasnot_letters=hasnot, has_letters=has)
+            #as pick_random_word, carrying the letter statistics over from the round before
+            w = self._dictionary[random.choice(candidates)]
+            possibilities_left, stats = self.rank_candidates(candidates, stats)
+            if len(possibilities_left) > 1: w = self._dictionary[possibilities_left[0]]
             
             r = self.compare_words(w, p)
             has += r['yellow'] + r['green']
@@ -393,20 +863,300 @@ class wordle_solver:
 
         return {'game': game, 'solved' : False, 'word' : p, 'attempts' : attempts+1}
 
-    def solve_many (self, guess_word=None, use_smart=True, start_with=None, stupid_mode=False, N_GAMES=100, attempts=6, exclude=0):
+    def _solve_scored (self, p, start_with, strategy, attempts):
+        '''
+        play a game with the entropy or minimax strategy
+        '''
+        game = []
+        candidates = np.arange(len(self._dictionary))
+        guess = start_with.upper() if start_with else self.best_guess(candidates, strategy)
+        
+        for a in range(attempts):
+            r = self.compare_words(guess, p)
+            game.append((r['word'], r['pattern']))
+            if r['solved']: return {'game': game, 'solved' : True, 'word' : p, 'attempts' : len(game)}
+            
+            #keep the words that would have given the same pattern
+            candidates = candidates[self._answer_codes(r['word'], candidates) == pattern_to_code(r['pattern'])]
+            if not len(candidates):
+                #the word is not in the dictionary
+                break
+            guess = self.best_guess(candidates, strategy)
+        
+        return {'game': game, 'solved' : False, 'word' : p, 'attempts' : attempts+1}
+
+    def _solve_tree (self, p, attempts):
+        '''
+        play a game following the decision tree in use
+        '''
+        game = []
+        history = ''
+        
+        for a in range(attempts):
+            guess = self._tree_guess(history)
+            if guess is None:
+                #the tree gave up here, or the word is not in the dictionary
+                break
+            r = self.compare_words(guess, p)
+            game.append((r['word'], r['pattern']))
+            if r['solved']: return {'game': game, 'solved' : True, 'word' : p, 'attempts' : len(game)}
+            
+            code = pattern_to_code(r['pattern'])
+            history = '%s.%s' % (history, code) if history else str(code)
+        
+        return {'game': game, 'solved' : False, 'word' : p, 'attempts' : attempts+1}
+
+    def solve_many (self, guess_word=None, use_smart=True, start_with=None, stupid_mode=False, N_GAMES=100, attempts=6, exclude=0, processes=1, seed=None, shard_size=100, strategy='frequency'):
+        '''
+        play N_GAMES and collect the success rate and the number of attempts of every game
+        
+        with processes > 1 (or None for all cores) games are split in shards of shard_size games
+        played by a pool of processes; every shard seeds its own random generator from seed and its
+        number, so the results for a given seed are the same whatever the number of processes
+        '''
 
         score = 0
         stuck = 0
         win = []
+        options = dict(guess_word=guess_word, use_smart=use_smart, start_with=start_with, stupid_mode=stupid_mode, attempts=attempts, exclude=exclude, strategy=strategy)
+
+        if processes == 1 and seed is None:
+            for i in range(N_GAMES):
+                r = self.solve(**options)
+                score += r['solved']
+                win.append (r['attempts'])
+                print ('Game # %s, word %s, solved in:%s \r' % (i, r['word'], r['attempts']), end="")
 
-        for i in range(N_GAMES):
-            r = self.solve(guess_word=guess_word, use_smart=use_smart, start_with=start_with, stupid_mode=stupid_mode, attempts=attempts, exclude=exclude)
-            score += r['solved']
-            win.append (r['attempts'])
-            print ('Game # %s, word %s, solved in:%s \r' % (i, r['word'], r['attempts']), end="")
+            return {'success_rate' : score / N_GAMES, 'stuck' : stuck, 'profile' : np.array(win)}
+
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        shards = [(options, '%s:%s' % (seed, n), min(shard_size, N_GAMES - start)) for n, start in enumerate(range(0, N_GAMES, shard_size))]
+
+        if processes == 1:
+            _init_worker(self)
+            results = map(_solve_shard, shards)
+        else:
+            #with fork the workers inherit the solver (dictionary, indexes, mapped pattern matrix)
+            #instead of receiving a pickled copy; elsewhere it is sent once per worker, never per task
+            context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+            pool = context.Pool(processes, initializer=_init_worker, initargs=(self,))
+            results = pool.imap(_solve_shard, shards)
+
+        try:
+            for solved, attempts_list in results:
+                score += solved
+                win.extend (attempts_list)
+                print ('Games played: %s of %s \r' % (len(win), N_GAMES), end="")
+        finally:
+            if processes != 1:
+                pool.close()
+                pool.join()
 
         return {'success_rate' : score / N_GAMES, 'stuck' : stuck, 'profile' : np.array(win)}
 
+    def evaluate (self, start_with=None, exclude=0, attempts=6, strategy='frequency', processes=1):
+        '''
+        play every word of the dictionary exactly once, with the strategy of
+        solve(start_with=start_with, exclude=exclude, strategy=strategy)
+        without start_with the frequency strategy starts from the first of the common words,
+        entropy and minimax from their own best guess; strategy 'tree' replays the loaded decision tree
+        
+        the next guess only depends on the feedback received so far, so instead of playing
+        each game on its own the games are followed down the tree of guesses together:
+        every guess is chosen once and the words still possible are split by the pattern it gets
+        with processes > 1 (or None for all cores) the groups left after the first guess are
+        followed by a pool of processes
+        
+        returns the success rate, the number of games per number of attempts (attempts + 1 means not solved),
+        the mean number of attempts of the solved games, the words not solved, the attempts of every
+        word in dictionary order (as the solve_many profile), the number of guesses chosen and
+        the decision tree itself (see build_tree)
+        '''
+        profile = np.zeros(len(self._dictionary), dtype=int)
+        tree = {}
+        settings = (strategy, exclude, attempts)
+        answers = np.arange(len(self._dictionary))
+        
+        if strategy == 'tree':
+            guess, state = self._tree_guess(''), (1,)
+        elif strategy != 'frequency':
+            guess, state = start_with.upper() if start_with else self.best_guess(answers, strategy), (1,)
+        else:
+            guess, state = (start_with or self.common_words[0]).upper(), (1, [], '', '', 0, exclude > 0, 0, None, None)
+
+        if processes == 1:
+            self._walk(answers, guess, '', state, settings, profile, tree)
+        else:
+            tree[''] = guess
+            codes = self._answer_codes(guess, answers)
+            branches = [(answers[codes == code], guess, int(code), '', state, settings) for code in np.unique(codes)]
+            #as in solve_many, with fork the workers inherit the solver and its mapped pattern matrix
+            context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+            pool = context.Pool(processes, initializer=_init_worker, initargs=(self,))
+            try:
+                #in order, so the same tree always comes out the same
+                for bucket, turns, subtree in pool.imap(_walk_branch, branches):
+                    profile[bucket] = turns
+                    tree.update(subtree)
+            finally:
+                pool.close()
+                pool.join()
+        
+        solved = profile <= attempts
+        return {'success_rate' : solved.mean(),
+                'distribution' : {n : int((profile == n).sum()) for n in range(1, attempts + 2)},
+                'mean' : profile[solved].mean() if solved.any() else None,
+                'failed' : [word for word, n in zip(self._dictionary, profile) if n > attempts],
+                'profile' : profile,
+                'nodes' : len(tree),
+                'tree' : tree}
+
+    def _walk (self, answers, guess, history, state, settings, profile, tree):
+        '''
+        one guess of evaluate: record it under the feedback history that led to it, split the answers
+        still possible by the pattern they give and follow each group
+        state is (turn,) for the scored strategies and the tree, and for the frequency strategy
+        (turn, game, has, hasnot, excluded, exclude_phase, main_rounds, candidates, stats) as in solve
+        '''
+        tree[history] = guess
+        codes = self._answer_codes(guess, answers)
+        for code in np.unique(codes):
+            self._walk_branch(answers[codes == code], guess, int(code), history, state, settings, profile, tree)
+
+    def _walk_branch (self, bucket, guess, code, history, state, settings, profile, tree):
+        '''
+        follow the answers that give the same pattern to guess
+        '''
+        strategy, exclude, attempts = settings
+        turn = state[0]
+        if code == 3 ** self.word_length - 1:
+            profile[bucket] = turn
+            return
+        
+        history = '%s.%s' % (history, code) if history else str(code)
+        
+        if strategy != 'frequency':
+            #with entropy and minimax the words still possible are exactly the answers in the group
+            next_guess = None
+            if turn < attempts:
+                next_guess = self._tree_guess(history) if strategy == 'tree' else self.best_guess(bucket, strategy)
+            if next_guess:
+                self._walk(bucket, next_guess, history, (turn + 1,), settings, profile, tree)
+            else:
+                profile[bucket] = attempts + 1
+            return
+        
+        turn, game, has, hasnot, excluded, exclude_phase, main_rounds, candidates, stats = state
+        pattern = code_to_pattern(code, guess)
+        next_game = game + [(guess, pattern)]
+        next_has = has + "".join(letter for letter, c in zip(guess, pattern) if c != '_')
+        next_hasnot = hasnot + "".join(letter for letter, c in zip(guess, pattern) if c == '_')
+        
+        #ROUNDS 2-3 (optional), as in solve
+        if exclude_phase and excluded < exclude:
+            found = self.filter_candidates(hasnot_letters=next_hasnot + next_has, norepeats=True)
+            if len(found):
+                next_guess = self._dictionary[self.rank_candidates(found)[0][0]]
+                next_state = (turn + 1, next_game, next_has, next_hasnot, excluded + 1, True, main_rounds, None, None)
+                self._walk(bucket, next_guess, history, next_state, settings, profile, tree)
+                return
+        
+        #ALL OTHER ROUNDS
+        if main_rounds < attempts - (excluded + 1):
+            found = self.filter_candidates(candidates, pattern=[p for _, p in next_game] if candidates is None else [pattern],
+                                           hasnot_letters=next_hasnot, has_letters=next_has)
+            ranked, next_stats = self.rank_candidates(found, stats)
+            next_guess = self._dictionary[ranked[0]]
+            next_state = (turn + 1, next_game, next_has, next_hasnot, excluded, False, main_rounds + 1, found, next_stats)
+            self._walk(bucket, next_guess, history, next_state, settings, profile, tree)
+        else:
+            profile[bucket] = attempts + 1
+
+    def build_tree (self, start_with=None, exclude=0, attempts=6, strategy='entropy', processes=1):
+        '''
+        the whole strategy as a decision tree, to be built once and replayed with solve(strategy='tree')
+        
+        the tree maps the feedback history of a game, the pattern codes received so far joined by dots
+        ('' before the first guess, then e.g. '34', '34.120'), to the word to play next; it is returned
+        with the settings it was built with and a hash of the word lists, and is also used by this solver
+        '''
+        result = self.evaluate(start_with, exclude=exclude, attempts=attempts, strategy=strategy, processes=processes)
+        tree = {'version' : self.CACHE_VERSION,
+                'dictionary' : self._cache_key(),
+                'word_length' : self.word_length,
+                'strategy' : strategy,
+                'start_with' : result['tree'][''],
+                'exclude' : exclude,
+                'attempts' : attempts,
+                'success_rate' : result['success_rate'],
+                'mean' : result['mean'],
+                'tree' : result['tree']}
+        self.use_tree(tree)
+        return tree
+
+    def use_tree (self, tree):
+        '''
+        play the given decision tree from now on, if it was built for the same word lists
+        '''
+        if tree['version'] != self.CACHE_VERSION or tree['dictionary'] != self._cache_key() or tree['word_length'] != self.word_length:
+            raise ValueError('The decision tree was built for a different dictionary')
+        self.tree = tree
+
+    def save_tree (self, filename, tree=None):
+        '''
+        write the decision tree (default: the one in use) as compact JSON, gzipped if filename ends in .gz
+        '''
+        tree = tree or self.tree
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'wt', encoding='utf-8') as f:
+            json.dump(tree, f, separators=(',', ':'))
+        print ('Saved decision tree with %s guesses to %s' % (len(tree['tree']), filename))
+
+    def load_tree (self, filename):
+        '''
+        read a decision tree written by save_tree and use it
+        '''
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'rt', encoding='utf-8') as f:
+            self.use_tree(json.load(f))
+        return self.tree
+
+    def _tree_guess (self, history):
+        '''
+        the guess of the decision tree in use after the given feedback history, None if there is none
+        '''
+        if self.tree is None:
+            raise ValueError('No decision tree in use, see build_tree and load_tree')
+        return self.tree['tree'].get(history)
+
+#solver used by the solve_many worker processes, set once per process
+_worker_solver = None
+
+def _init_worker(solver):
+    global _worker_solver
+    _worker_solver = solver
+
+def _walk_branch(branch):
+    '''
+    follow one group of answers of the first guess of evaluate, returning the answers,
+    the attempts each needed and the part of the decision tree played
+    '''
+    bucket, guess, code, history, state, settings = branch
+    profile = np.zeros(len(_worker_solver._dictionary), dtype=int)
+    tree = {}
+    _worker_solver._walk_branch(bucket, guess, code, history, state, settings, profile, tree)
+    return bucket, profile[bucket], tree
+
+def _solve_shard(shard):
+    '''
+    play one shard of solve_many games, returning the number solved and the attempts of each game
+    '''
+    options, seed, games = shard
+    random.seed(seed)
+    results = [_worker_solver.solve(**options) for _ in range(games)]
+    return sum(r['solved'] for r in results), [r['attempts'] for r in results]
+
 if __name__ == '__main__':
 
     g = wordle_solver('wordle_words.txt')